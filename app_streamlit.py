@@ -6,33 +6,128 @@ import logging
 from src.data_loader import load_local_data
 from src.preprocessing import clean_and_handle_missing_values
 from src.feature_engineering import create_features
-from src.modelling import build_hybrid_model, calculate_evaluation_metrics
+from src.modelling import NeighborIndex, build_neighbor_index, calculate_evaluation_metrics
+from src.ann import HybridANNIndex
+from src.search_index import SearchIndex
+from src.name_lookup import NameLookupIndex
 from src.integratedRecommender import IntegratedRecommender
 from src.evaluasiLlm import LLMTools
 from src.rekom import CollaborativeFilteringRecommender
+from src.interaction_log import InteractionConsolidator
+from src.artifact_store import ArtifactStore, compute_artifact_key, sparse_to_arrays, arrays_to_sparse
 
 # Import UI Components & Views
-from components.layout import inject_custom_css, ICON_PATH, DATA_FILE_PATH
+from components.layout import inject_custom_css, ICON_PATH, DATA_FILE_PATH, ARTIFACT_DIR
+from components.logic import get_interaction_log
 from views import home, recommender, category
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# --- Parameter Pipeline (ikut menentukan key artifact bundle) ---
+PIPELINE_PARAMS = {
+    "top_k": 100, "num_users": 500, "random_seed": 42, "cf_top_k": 100,
+    # ANN untuk build neighbor index (None = eksak). Contoh: {"n_components": 128, "n_probe": 8}
+    "ann": None,
+}
+# TF-IDF paralel (-1 = semua core); hasilnya identik dengan TfidfVectorizer (cek: python -m benchmarks.check_tfidf_parity),
+# jadi tidak ikut menentukan key bundle
+TFIDF_N_JOBS = -1
+# Interval (detik) konsolidasi interaction log ke model CF
+CONSOLIDATION_INTERVAL = 60.0
+
+def _build_artifacts():
+    """Build penuh dari CSV: cleaning, TF-IDF, neighbor index, metrik, dan simulasi CF."""
+    # File dibaca sekali (skema eksplisit), dipakai bersama oleh hybrid & CF
+    raw_df = load_local_data(DATA_FILE_PATH)
+    if raw_df.empty:
+        return None
+
+    # Pre-processing & feature
+    df = clean_and_handle_missing_values(raw_df)
+    # Mode compact: TF-IDF float32, fitur numerik di array terpisah (katalog tetap ramping)
+    df, tfidf_matrix, numeric_features, vectorizer = create_features(df, return_vectorizer=True, compact=True, n_jobs=TFIDF_N_JOBS)
+    ann = HybridANNIndex(**PIPELINE_PARAMS["ann"]) if PIPELINE_PARAMS["ann"] else None
+    neighbor_index = build_neighbor_index(
+        df, tfidf_matrix, top_k=PIPELINE_PARAMS["top_k"], numeric_features=numeric_features, ann=ann
+    )
+    metrics = calculate_evaluation_metrics(df, neighbor_index)
+
+    # CFRecommender (jika gagal, tetap lanjut)
+    try:
+        cf_recommender = CollaborativeFilteringRecommender(
+            data_path=DATA_FILE_PATH, num_users=PIPELINE_PARAMS["num_users"], random_seed=PIPELINE_PARAMS["random_seed"],
+            raw_df=raw_df, top_k=PIPELINE_PARAMS["cf_top_k"]
+        )
+    except Exception as e:
+        logger.warning(f"CFRecommender gagal diinisialisasi: {e}")
+        cf_recommender = None
+
+    frames = {"catalogue": df}
+    if cf_recommender is not None:
+        frames["cf_catalogue"] = cf_recommender.df
+        frames["cf_interactions"] = cf_recommender.interactions_df
+    arrays = {
+        "neighbor_indices": neighbor_index.indices,
+        "neighbor_scores": neighbor_index.scores,
+        "numeric_features": numeric_features,
+        **sparse_to_arrays("tfidf", tfidf_matrix),
+        # Salinan kolom (CSC) untuk pencarian teks bebas: di-memmap bersama, bukan dibangun per proses
+        **sparse_to_arrays("tfidf_csc", tfidf_matrix, fmt="csc"),
+    }
+    if cf_recommender is not None:
+        arrays.update(sparse_to_arrays("cf_item_similarity", cf_recommender.item_similarity))
+    # Inverted index keyword search (BM25) untuk kotak pencarian & halaman kategori
+    # Index nama ikut disimpan agar warm start tidak membangunnya ulang
+    objects = {"vectorizer": vectorizer, "search_index": SearchIndex(df), "name_index": NameLookupIndex(df['Name'])}
+    if ann is not None:
+        objects["ann"] = ann
+    bundle = {"frames": frames, "arrays": arrays, "objects": objects, "meta": {"metrics": metrics}}
+    return bundle, cf_recommender
+
+def _cf_from_bundle(bundle):
+    """Rakit ulang CFRecommender dari bundle tanpa membaca CSV / simulasi ulang.
+
+    Array CSR similarity top-K dibuka sebagai np.memmap read-only: semua replica di host yang sama
+    berbagi satu salinan fisik lewat page cache OS.
+    """
+    frames = bundle["frames"]
+    if "cf_catalogue" not in frames:
+        return None
+    try:
+        return CollaborativeFilteringRecommender(
+            data_path=DATA_FILE_PATH, num_users=PIPELINE_PARAMS["num_users"], random_seed=PIPELINE_PARAMS["random_seed"],
+            df=frames["cf_catalogue"], interactions_df=frames["cf_interactions"],
+            item_similarity=arrays_to_sparse("cf_item_similarity", bundle["arrays"]), top_k=PIPELINE_PARAMS["cf_top_k"]
+        )
+    except Exception as e:
+        logger.warning(f"CFRecommender gagal diinisialisasi: {e}")
+        return None
+
 # --- Inisialisasi System ---
 @st.cache_resource
 def initialize_system():
     try:
-        # Load CSV
-        df = load_local_data(DATA_FILE_PATH)
-        if df.empty:
-            logger.warning("CSV kosong.")
-            return None, None, None, None, None
-
-        # Pre-processing & feature
-        df = clean_and_handle_missing_values(df)
-        df, tfidf_matrix = create_features(df)
-        hybrid_sim = build_hybrid_model(df, tfidf_matrix)
-        metrics = calculate_evaluation_metrics(df, hybrid_sim)
+        # Warm start: muat bundle yang cocok dengan isi CSV + parameter pipeline
+        store = ArtifactStore(ARTIFACT_DIR)
+        key = compute_artifact_key(DATA_FILE_PATH, PIPELINE_PARAMS)
+        if store.exists(key):
+            bundle = store.load(key)
+            cf_recommender = _cf_from_bundle(bundle)
+        else:
+            built = _build_artifacts()
+            if built is None:
+                logger.warning("CSV kosong.")
+                return None, None, None, None, None
+            bundle, cf_recommender = built
+            try:
+                store.save(key, **bundle)
+            except Exception as e:
+                logger.warning(f"Artifact bundle gagal disimpan: {e}")
+
+        df = bundle["frames"]["catalogue"]
+        neighbor_index = NeighborIndex(bundle["arrays"]["neighbor_indices"], bundle["arrays"]["neighbor_scores"])
+        metrics = bundle["meta"]["metrics"]
 
         # LLMTools (jika gagal, tetap lanjut)
         try:
@@ -42,16 +137,23 @@ def initialize_system():
             llm_tools = None
 
         # Hybrid Recommender
-        recommender_system = IntegratedRecommender(df, hybrid_sim)
-
-        # CFRecommender (jika gagal, tetap lanjut)
-        try:
-            cf_recommender = CollaborativeFilteringRecommender(
-                data_path=DATA_FILE_PATH, num_users=500, random_seed=42
-            )
-        except Exception as e:
-            logger.warning(f"CFRecommender gagal diinisialisasi: {e}")
-            cf_recommender = None
+        recommender_system = IntegratedRecommender(
+            df, neighbor_index, vectorizer=bundle["objects"].get("vectorizer"),
+            tfidf_matrix=arrays_to_sparse("tfidf", bundle["arrays"]), ann=bundle["objects"].get("ann"),
+            tfidf_csc=arrays_to_sparse("tfidf_csc", bundle["arrays"], fmt="csc"),
+            search_index=bundle["objects"].get("search_index"), name_index=bundle["objects"].get("name_index")
+        )
+
+        # Interaksi nyata dari log (cart/view) dikonsolidasi ke CF di thread latar. Hanya satu proses
+        # (pemegang kunci file) yang mengkonsolidasi dan menerbitkan model ke store; replica lain memuat
+        # model terbitan itu (memmap) dan mengambil alih kunci jika pemegangnya berhenti
+        if cf_recommender is not None:
+            try:
+                InteractionConsolidator(
+                    get_interaction_log(), cf_recommender, interval=CONSOLIDATION_INTERVAL, store=store, model_key=key
+                ).start()
+            except Exception as e:
+                logger.warning(f"Konsolidasi interaction log tidak dijalankan: {e}")
 
         return df, recommender_system, llm_tools, metrics, cf_recommender
 
@@ -84,7 +186,7 @@ def main():
         recommender.show(df, recommender_sys, llm_tools, metrics, cf_recommender)
         
     elif st.session_state["current_page"] == "category_view":
-        category.show(df)
+        category.show(df, recommender_sys.search_index)
 
 if __name__ == "__main__":
     main()
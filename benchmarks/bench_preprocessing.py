@@ -0,0 +1,47 @@
+# benchmarks/bench_preprocessing.py
+"""Benchmark pengisian rating per grup: fill_with_group_mean vs groupby + lambda (cara lama).
+
+Jalankan dari root proyek:  python -m benchmarks.bench_preprocessing
+Waktu fill_with_group_mean seharusnya naik linear terhadap jumlah baris dan hampir tidak
+terpengaruh jumlah grup; cara lama naik seiring jumlah grup (satu panggilan lambda per grup).
+"""
+
+import time
+import numpy as np
+import pandas as pd
+from src.preprocessing import fill_with_group_mean
+
+# Cara lama dilewati jika jumlah grupnya terlalu besar (bisa makan waktu menit)
+LEGACY_MAX_GROUPS = 20_000
+
+def make_ratings(n_rows: int, n_groups: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    ratings = rng.uniform(1, 5, n_rows).astype(np.float32)
+    ratings[rng.random(n_rows) < 0.2] = np.nan
+    groups = pd.Series(rng.integers(0, n_groups, n_rows)).map(lambda g: f"brand_{g}")
+    return pd.Series(ratings, name='Rating'), groups
+
+def _best_of(fn, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def run(sizes=(100_000, 1_000_000), group_counts=(100, 10_000, 100_000)):
+    print(f"{'rows':>10} {'groups':>8} {'vectorised (s)':>15} {'lambda (s)':>12}")
+    for n_rows in sizes:
+        for n_groups in group_counts:
+            ratings, groups = make_ratings(n_rows, n_groups)
+            fast = _best_of(lambda: fill_with_group_mean(ratings, groups))
+            if n_groups <= LEGACY_MAX_GROUPS:
+                frame = pd.DataFrame({'Rating': ratings, 'Brand': groups})
+                legacy = _best_of(lambda: frame.groupby('Brand')['Rating'].transform(lambda x: x.fillna(x.mean())), 1)
+                legacy = f"{legacy:12.3f}"
+            else:
+                legacy = f"{'-':>12}"
+            print(f"{n_rows:>10} {n_groups:>8} {fast:15.3f} {legacy}")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,42 @@
+# benchmarks/check_tfidf_parity.py
+"""Cek paritas ParallelTfidfVectorizer vs TfidfVectorizer (vocabulary, IDF, dan matriks TF-IDF).
+
+Jalankan dari root proyek:  python -m benchmarks.check_tfidf_parity
+Korpus sintetis sengaja punya vocabulary jauh lebih besar dari max_features dan banyak term
+berfrekuensi sama di batas potong, supaya pemilihan term (termasuk pemecah seri) ikut teruji.
+Keluar dengan AssertionError jika ada perbedaan.
+"""
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from src.feature_engineering import ParallelTfidfVectorizer
+
+def make_corpus(n_docs: int = 6000, n_terms: int = 30000, doc_len: int = 20, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    # Zipf terpotong → banyak term langka dengan frekuensi kecil yang sama (seri di batas max_features)
+    ranks = np.minimum(rng.zipf(1.1, size=(n_docs, doc_len)), n_terms) - 1
+    return [' '.join(f"term{r}" for r in row) for row in ranks]
+
+def check(texts, max_features: int = 5000, chunk_size: int = 1000, dtype=np.float64):
+    expected = TfidfVectorizer(stop_words='english', max_features=max_features, dtype=dtype)
+    expected_matrix = expected.fit_transform(texts)
+    parallel = ParallelTfidfVectorizer(max_features=max_features, n_jobs=1, chunk_size=chunk_size, dtype=dtype)
+    parallel_matrix = parallel.fit_transform(texts)
+
+    n_vocab = len(TfidfVectorizer(stop_words='english').fit(texts).vocabulary_)
+    assert n_vocab > max_features, f"vocabulary ({n_vocab}) harus lebih besar dari max_features ({max_features})"
+    missing = set(expected.vocabulary_) - set(parallel.vocabulary_)
+    extra = set(parallel.vocabulary_) - set(expected.vocabulary_)
+    assert not missing and not extra, f"vocabulary beda: {len(missing)} hilang, {len(extra)} tambahan"
+    assert expected.vocabulary_ == parallel.vocabulary_, "urutan kolom vocabulary beda"
+    # sklearn menyimpan IDF dalam dtype output; versi paralel selalu float64
+    np.testing.assert_allclose(parallel.idf_, expected.idf_, rtol=1e-6 if dtype == np.float32 else 1e-12)
+    diff = abs(parallel_matrix - expected_matrix).max() if expected_matrix.nnz else 0.0
+    assert diff < 1e-6, f"nilai TF-IDF beda (maks {diff})"
+    print(f"OK: {len(texts)} dokumen, vocabulary {n_vocab} → {len(parallel.vocabulary_)} term, selisih maks {diff:.2e}")
+
+if __name__ == "__main__":
+    texts = make_corpus()
+    for dtype in (np.float64, np.float32):
+        check(texts, dtype=dtype)
+    check(texts[:500], max_features=100, chunk_size=64)
@@ -1,7 +1,7 @@
 import streamlit as st
 import pandas as pd
 import time
-from components.logic import add_to_cart
+from components.logic import add_to_cart, log_event
 
 PLACEHOLDER_IMG = "https://via.placeholder.com/150?text=No+Image"
 
@@ -125,6 +125,7 @@ def render_product_card(row, full_df=None, prefix=""):
         unique_key = f"{prefix}_btn_{row.get('ProdID', row.name)}" if prefix else f"btn_{row.get('ProdID', row.name)}"
         if st.button("Lihat Detail", key=unique_key, use_container_width=True, type="primary"):
             full_data = full_df.loc[row.name] if full_df is not None and row.name in full_df.index else row
+            log_event("view", prod_id=full_data.get('ProdID'))
             show_product_popup(full_data, score=row.get('final_score', None))
 
 def display_grid(products, title, full_df=None, prefix=""):
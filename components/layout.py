@@ -4,6 +4,8 @@ import os
 # --- Konfigurasi Global ---
 BASE_DIR = os.getcwd()   # ROOT repo di Streamlit Cloud
 DATA_FILE_PATH = os.path.join(BASE_DIR, "data", "product_data.csv")
+ARTIFACT_DIR = os.path.join(BASE_DIR, "artifacts")   # bundle model hasil build (lihat src/artifact_store.py)
+INTERACTION_LOG_PATH = os.path.join(BASE_DIR, "data", "interactions.sqlite")   # log event user (lihat src/interaction_log.py)
 LOGO_PATH = 'assets/logo.png' 
 ICON_PATH = 'assets/icon.png'
 
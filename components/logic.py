@@ -1,19 +1,65 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
+import re
+import uuid
+import logging
+from components.layout import INTERACTION_LOG_PATH
+from src.interaction_log import InteractionLog
 
-def filter_by_category(df, category_name):
-    """Filter dataframe menggunakan regex boundary untuk akurasi lebih tinggi."""
+logger = logging.getLogger(__name__)
+
+@st.cache_resource
+def get_interaction_log():
+    """Satu InteractionLog per proses, dipakai bersama semua sesi."""
+    return InteractionLog(INTERACTION_LOG_PATH)
+
+def log_event(event, prod_id=None, query=None):
+    """Catat event user sesi ini ('view', 'cart', 'search'); tidak memblok UI (ditulis thread latar)."""
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = f"session_{uuid.uuid4().hex}"
+    try:
+        get_interaction_log().log(event, st.session_state.session_id, prod_id=prod_id, query=query)
+    except Exception as e:
+        logger.warning(f"Gagal mencatat event '{event}': {e}")
+
+# Kata kunci per kategori halaman (frasa multi-kata dicocokkan sebagai semua katanya)
+CATEGORY_KEYWORDS = {
+    "skincare": ["skin", "facial", "cleanser", "moisturizer", "serum", "acne", "eczema", "face", "lip care", "vaseline", "cetaphil"],
+    "haircare": ["hair", "shampoo", "conditioner", "dandruff", "styling", "mousse", "pantene", "head & shoulders"],
+    "make up": ["makeup", "lipstick", "lip balm", "foundation", "blush", "primer", "mascara", "eyeshadow", "concealer", "powder"],
+    "bodycare": ["body", "bath", "shower", "lotion", "cream", "scrub", "soap", "deodorant", "shaving", "razor", "body wash"]
+}
+
+def _match_keywords(df, search_index, keywords, fields):
+    """Posisi produk (terurut) yang memuat salah satu keyword di fields, lewat inverted index."""
+    matches = []
+    for keyword in keywords:
+        pos = search_index.match(keyword, fields=fields, operator='and')
+        if ' ' in keyword and len(pos):
+            # Frasa: index hanya menjamin semua katanya ada → urutan kata dicek regex pada kandidat saja
+            pattern = r'\b' + re.escape(keyword) + r'\b'
+            in_phrase = np.zeros(len(pos), dtype=bool)
+            for field in fields:
+                in_phrase |= df[field].iloc[pos].astype(str).str.contains(pattern, case=False, regex=True).to_numpy()
+            pos = pos[in_phrase]
+        matches.append(pos)
+    return np.unique(np.concatenate(matches)) if matches else np.empty(0, dtype=np.int64)
+
+def filter_by_category(df, category_name, search_index=None):
+    """Filter dataframe per kategori lewat inverted index (SearchIndex); tanpa index, regex boundary."""
     df_filtered = pd.DataFrame()
     cat_lower = category_name.lower()
-    
-    keywords = {
-        "skincare": r'\b(skin|facial|cleanser|moisturizer|serum|acne|eczema|face|lip care|vaseline|cetaphil)\b',
-        "haircare": r'\b(hair|shampoo|conditioner|dandruff|styling|mousse|pantene|head & shoulders)\b',
-        "make up": r'\b(makeup|lipstick|lip balm|foundation|blush|primer|mascara|eyeshadow|concealer|powder)\b',
-        "bodycare": r'\b(body|bath|shower|lotion|cream|scrub|soap|deodorant|shaving|razor|body wash)\b'
-    }
-
-    if cat_lower in keywords:
+    keywords = {cat: r'\b(' + '|'.join(words) + r')\b' for cat, words in CATEGORY_KEYWORDS.items()}
+
+    if search_index is not None and cat_lower in CATEGORY_KEYWORDS:
+        df_filtered = df.iloc[_match_keywords(df, search_index, CATEGORY_KEYWORDS[cat_lower], ('Category', 'Name'))]
+    elif search_index is not None and cat_lower == "others":
+        all_keywords = [word for words in CATEGORY_KEYWORDS.values() for word in words]
+        mask = np.ones(len(df), dtype=bool)
+        mask[_match_keywords(df, search_index, all_keywords, ('Category',))] = False
+        df_filtered = df[mask]
+    elif cat_lower in keywords:
         mask = df['Category'].str.contains(keywords[cat_lower], case=False, regex=True, na=False) | \
             df['Name'].str.contains(keywords[cat_lower], case=False, regex=True, na=False)
         df_filtered = df[mask]
@@ -31,6 +77,7 @@ def add_to_cart(pid):
         st.session_state.cart = []
     if pid not in st.session_state.cart:
         st.session_state.cart.append(pid)
+        log_event("cart", prod_id=pid)
         st.toast(f"Produk berhasil ditambahkan ke keranjang! 🛒", icon="✅")
     else:
         st.toast(f"Produk sudah ada di keranjang!", icon="⚠️")
\ No newline at end of file
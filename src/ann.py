@@ -0,0 +1,142 @@
+# src/ann.py
+
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from sklearn.preprocessing import normalize
+import logging
+from src.modelling import CONTENT_WEIGHT, NUMERIC_WEIGHT, NumericAngles, select_top_n
+
+logger = logging.getLogger(__name__)
+
+class IVFIndex:
+    """Approximate maximum-inner-product search dengan coarse quantiser IVF (k-means sferis).
+
+    Vektor dikelompokkan ke `n_lists` centroid; query hanya membandingkan isi `n_probe` list dengan
+    centroid terdekat. Knob recall/latensi: n_probe (lebih besar → recall naik, lebih lambat) dan
+    n_lists (default √N → biaya per query ~ n_probe·√N, bukan N).
+    """
+
+    def __init__(self, n_lists: int = None, n_probe: int = 8, n_iter: int = 10, sample_size: int = 100_000,
+                 random_state: int = 42):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.n_iter = n_iter
+        self.sample_size = sample_size
+        self.random_state = random_state
+        self.vectors = None
+        self.centroids = None
+        self.list_items = None
+        self.list_offsets = None
+
+    def _assign(self, vectors: np.ndarray, block_size: int = 8192) -> np.ndarray:
+        labels = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), block_size):
+            labels[start:start + block_size] = np.argmax(vectors[start:start + block_size] @ self.centroids.T, axis=1)
+        return labels
+
+    def fit(self, vectors: np.ndarray):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        n = len(vectors)
+        n_lists = max(1, min(self.n_lists or int(np.sqrt(n)), n))
+        rng = np.random.default_rng(self.random_state)
+
+        # k-means pada sampel (biaya fit tidak tumbuh dengan katalog di atas sample_size)
+        sample = vectors[rng.choice(n, min(n, max(self.sample_size, n_lists)), replace=False)]
+        self.centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(self.n_iter):
+            labels = self._assign(sample)
+            sums = np.zeros_like(self.centroids)
+            np.add.at(sums, labels, sample)
+            filled = np.bincount(labels, minlength=n_lists) > 0
+            # Centroid kosong dibiarkan; sisanya dinormalisasi (k-means sferis untuk inner product)
+            self.centroids[filled] = normalize(sums[filled])
+
+        labels = self._assign(vectors)
+        self.list_items = np.argsort(labels, kind='stable')
+        self.list_offsets = np.concatenate([[0], np.cumsum(np.bincount(labels, minlength=n_lists))])
+        self.vectors = vectors
+        for arr in (self.vectors, self.centroids, self.list_items, self.list_offsets):
+            arr.flags.writeable = False
+        logger.info(f"IVF index: {n} vektor, {n_lists} list, dim {vectors.shape[1]}")
+        return self
+
+    def search(self, queries: np.ndarray, k: int, n_probe: int = None, exclude: np.ndarray = None):
+        """Top-k inner product per query → (indices, scores) (M, k); padding -1 / -inf.
+
+        exclude: satu posisi per query yang tidak boleh muncul (mis. produk itu sendiri).
+        Query dikelompokkan per list sehingga tiap list cukup satu perkalian matriks.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        n_probe = min(n_probe or self.n_probe, len(self.centroids))
+        n_queries = len(queries)
+        best_idx = np.full((n_queries, k), -1, dtype=np.int64)
+        best_scores = np.full((n_queries, k), -np.inf, dtype=np.float32)
+
+        probes, _ = select_top_n(queries @ self.centroids.T, n_probe)
+        flat = probes.ravel()
+        owners = np.repeat(np.arange(n_queries), n_probe)
+        order = np.argsort(flat, kind='stable')
+        lists, starts = np.unique(flat[order], return_index=True)
+        bounds = np.append(starts, len(order))
+
+        for j, lst in enumerate(lists):
+            q_rows = owners[order[bounds[j]:bounds[j + 1]]]
+            members = self.list_items[self.list_offsets[lst]:self.list_offsets[lst + 1]]
+            if len(members) == 0:
+                continue
+            scores = queries[q_rows] @ self.vectors[members].T
+            if exclude is not None:
+                scores[members[None, :] == np.asarray(exclude)[q_rows, None]] = -np.inf
+            cand_idx = np.hstack([best_idx[q_rows], np.broadcast_to(members, scores.shape)])
+            cand_scores = np.hstack([best_scores[q_rows], scores])
+            top, top_scores = select_top_n(cand_scores, k)
+            best_idx[q_rows] = np.take_along_axis(cand_idx, top, axis=1)
+            best_scores[q_rows] = top_scores
+
+        best_idx[~np.isfinite(best_scores)] = -1
+        return best_idx, best_scores
+
+class HybridANNIndex:
+    """ANN untuk skor hybrid: embedding TruncatedSVD dari TF-IDF + sudut numerik dalam satu ruang.
+
+    Skor hybrid = w_c·cos(konten) + w_n·cos(θi − θj), dan cos(θi − θj) = cosθi·cosθj + sinθi·sinθj,
+    sehingga vektor [√w_c·e, √w_n·cosθ, √w_n·sinθ] (e = embedding konten ter-normalisasi) memberi
+    inner product ≈ skor hybrid. IVF mencari kandidat di ruang ini; skor final dihitung ulang eksak.
+    Knob: n_components (fidelitas embedding), n_lists & n_probe (recall vs latensi).
+    """
+
+    def __init__(self, n_components: int = 128, n_lists: int = None, n_probe: int = 8, random_state: int = 42):
+        self.n_components = n_components
+        self.svd = None
+        self.ivf = IVFIndex(n_lists=n_lists, n_probe=n_probe, random_state=random_state)
+
+    @property
+    def is_fitted(self) -> bool:
+        return self.svd is not None
+
+    def embed_content(self, tfidf_rows) -> np.ndarray:
+        """TF-IDF (baris katalog atau query teks yang sudah di-transform) → embedding unit float32."""
+        return normalize(self.svd.transform(tfidf_rows)).astype(np.float32)
+
+    def fit(self, tfidf_matrix, numeric: NumericAngles):
+        n_components = max(1, min(self.n_components, tfidf_matrix.shape[1] - 1, tfidf_matrix.shape[0] - 1))
+        self.svd = TruncatedSVD(n_components=n_components, random_state=self.ivf.random_state)
+        self.svd.fit(tfidf_matrix)
+        numeric_part = np.column_stack([np.cos(numeric.angles), np.sin(numeric.angles)]) * numeric.valid[:, None]
+        vectors = np.hstack([
+            np.sqrt(CONTENT_WEIGHT) * self.embed_content(tfidf_matrix),
+            np.sqrt(NUMERIC_WEIGHT) * numeric_part.astype(np.float32),
+        ])
+        self.ivf.fit(vectors)
+        return self
+
+    def candidates(self, rows, n: int, n_probe: int = None):
+        """Kandidat tetangga hybrid untuk baris katalog (tanpa diri sendiri) → (indices, skor perkiraan)."""
+        rows = np.atleast_1d(rows)
+        return self.ivf.search(self.ivf.vectors[rows], n, n_probe=n_probe, exclude=rows)
+
+    def query(self, tfidf_query, n: int, n_probe: int = None):
+        """Kandidat untuk query teks bebas (hanya bagian konten; bagian numerik query = 0)."""
+        content = self.embed_content(tfidf_query)
+        vectors = np.hstack([content, np.zeros((len(content), 2), dtype=np.float32)])
+        return self.ivf.search(vectors, n, n_probe=n_probe)
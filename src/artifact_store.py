@@ -0,0 +1,118 @@
+# src/artifact_store.py
+
+import os
+import json
+import shutil
+import hashlib
+import joblib
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Naikkan versi ini setiap kali format/isi bundle berubah → bundle lama otomatis diabaikan
+ARTIFACT_VERSION = 10
+
+def compute_artifact_key(data_path: str, params: dict) -> str:
+    """Hash isi file data + parameter pipeline + versi format → nama bundle."""
+    digest = hashlib.sha256()
+    with open(data_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+    digest.update(f"v{ARTIFACT_VERSION}".encode())
+    return digest.hexdigest()[:16]
+
+def sparse_to_arrays(prefix: str, matrix, fmt: str = "csr") -> dict:
+    """Pecah matriks CSR (atau CSC, fmt="csc") menjadi array data/indices/indptr agar bisa disimpan sebagai .npy."""
+    matrix = sp.csc_matrix(matrix) if fmt == "csc" else sp.csr_matrix(matrix)
+    return {
+        f"{prefix}_data": matrix.data,
+        f"{prefix}_indices": matrix.indices,
+        f"{prefix}_indptr": matrix.indptr,
+        f"{prefix}_shape": np.asarray(matrix.shape, dtype=np.int64),
+    }
+
+def arrays_to_sparse(prefix: str, arrays: dict, fmt: str = "csr"):
+    """Rakit ulang CSR (atau CSC, fmt="csc") dari array (boleh memmap, tanpa salinan)."""
+    shape = tuple(int(x) for x in arrays[f"{prefix}_shape"])
+    matrix_cls = sp.csc_matrix if fmt == "csc" else sp.csr_matrix
+    return matrix_cls(
+        (arrays[f"{prefix}_data"], arrays[f"{prefix}_indices"], arrays[f"{prefix}_indptr"]),
+        shape=shape, copy=False
+    )
+
+class ArtifactStore:
+    """Penyimpanan bundle model di disk, satu folder per key.
+
+    Isi bundle:
+      - frames/*.parquet : DataFrame (format kolumnar)
+      - arrays/*.npy     : array NumPy, dibuka dengan memory mapping (read-only)
+      - objects/*.joblib : objek Python kecil (mis. vectorizer)
+      - meta.json        : metrik & info tambahan (ditulis terakhir → penanda bundle lengkap)
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(os.path.join(self.path(key), "meta.json"))
+
+    def keys(self, prefix: str = "") -> list:
+        """Key bundle lengkap (meta.json sudah ditulis) yang diawali `prefix`, urut nama."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(k for k in os.listdir(self.root) if k.startswith(prefix) and self.exists(k))
+
+    def delete(self, key: str):
+        """Hapus bundle. Proses yang masih me-memmap array-nya tetap aman di POSIX (file baru benar-benar
+        hilang setelah mapping ditutup); di Windows file yang masih dibuka dilewati."""
+        shutil.rmtree(self.path(key), ignore_errors=True)
+
+    def save(self, key: str, frames: dict = None, arrays: dict = None, objects: dict = None, meta: dict = None):
+        """Tulis bundle ke folder sementara lalu rename atomik, agar proses lain tidak membaca bundle setengah jadi."""
+        final_dir = self.path(key)
+        tmp_dir = f"{final_dir}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        for sub in ("frames", "arrays", "objects"):
+            os.makedirs(os.path.join(tmp_dir, sub))
+
+        for name, frame in (frames or {}).items():
+            frame.to_parquet(os.path.join(tmp_dir, "frames", f"{name}.parquet"))
+        for name, arr in (arrays or {}).items():
+            np.save(os.path.join(tmp_dir, "arrays", f"{name}.npy"), np.ascontiguousarray(arr))
+        for name, obj in (objects or {}).items():
+            joblib.dump(obj, os.path.join(tmp_dir, "objects", f"{name}.joblib"))
+        with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+            json.dump({"version": ARTIFACT_VERSION, **(meta or {})}, f, default=float)
+
+        if os.path.exists(final_dir):
+            # Bundle yang sama sudah ditulis proses lain
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        else:
+            os.replace(tmp_dir, final_dir)
+        logger.info(f"Artifact bundle tersimpan: {final_dir}")
+
+    def load(self, key: str, mmap: bool = True) -> dict:
+        """Muat bundle → {'frames', 'arrays', 'objects', 'meta'}; array dibuka via np.load(mmap_mode='r')."""
+        base = self.path(key)
+        mmap_mode = "r" if mmap else None
+
+        def _listing(sub, ext):
+            folder = os.path.join(base, sub)
+            return [(f[:-len(ext)], os.path.join(folder, f)) for f in sorted(os.listdir(folder)) if f.endswith(ext)]
+
+        bundle = {
+            "frames": {name: pd.read_parquet(path) for name, path in _listing("frames", ".parquet")},
+            "arrays": {name: np.load(path, mmap_mode=mmap_mode) for name, path in _listing("arrays", ".npy")},
+            "objects": {name: joblib.load(path) for name, path in _listing("objects", ".joblib")},
+        }
+        with open(os.path.join(base, "meta.json")) as f:
+            bundle["meta"] = json.load(f)
+        logger.info(f"Artifact bundle dimuat: {base}")
+        return bundle
@@ -1,20 +1,102 @@
 import pandas as pd
+import numpy as np
 import os
 import streamlit as st
 import logging
+from pandas.api.types import union_categoricals
 
 logger = logging.getLogger(__name__)
 
-def load_local_data(file_path: str) -> "pd.DataFrame":
-    """Memuat data dari file CSV lokal."""
-    
+# pandas >= 3 punya dtype teks 'str' yang ringkas (NaN tetap NaN); versi lama memakai object
+TEXT_DTYPE = 'str' if int(pd.__version__.split('.')[0]) >= 3 else 'object'
+
+# Skema katalog: hanya kolom ini yang dibaca, dengan dtype eksplisit (tanpa inferensi)
+PRODUCT_SCHEMA = {
+    'ProdID': None,            # dibiarkan apa adanya (bisa angka atau teks)
+    'Name': TEXT_DTYPE,
+    'Brand': 'category',
+    'Category': 'category',
+    'Rating': 'float32',
+    'ReviewCount': 'float32',
+    'Description': TEXT_DTYPE,
+    'Tags': TEXT_DTYPE,
+    'ImageURL': TEXT_DTYPE,
+}
+
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+ARROW_EXTENSIONS = ('.feather', '.arrow')
+
+def _apply_schema(df: pd.DataFrame, schema: dict) -> pd.DataFrame:
+    """Samakan dtype dengan skema; kolom skema yang tidak ada di file ditambahkan kosong.
+
+    Kolom ber-dtype None (ProdID) tidak ditambahkan: pemakai punya fallback sendiri jika kolomnya tidak ada.
+    """
+    for col, dtype in schema.items():
+        if col not in df.columns:
+            if dtype is None:
+                continue
+            logger.warning(f"Kolom '{col}' tidak ada di file, diisi kosong.")
+            df[col] = np.nan
+        if dtype == 'float32':
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(dtype)
+        elif dtype is not None and df[col].dtype != dtype:
+            df[col] = df[col].astype(dtype)
+    return df[[col for col in schema if col in df.columns]]
+
+def _concat_chunks(chunks: list) -> pd.DataFrame:
+    """Gabung chunk tanpa kehilangan dtype category (kategori tiap chunk disatukan)."""
+    if len(chunks) == 1:
+        return chunks[0]
+    category_cols = [c for c in chunks[0].columns if isinstance(chunks[0][c].dtype, pd.CategoricalDtype)]
+    df = pd.concat([chunk.drop(columns=category_cols) for chunk in chunks], ignore_index=True)
+    for col in category_cols:
+        df[col] = union_categoricals([chunk[col] for chunk in chunks])
+    return df[chunks[0].columns]
+
+def _file_columns(file_path: str, ext: str) -> list:
+    """Nama kolom file Parquet/Arrow dari metadata saja (tanpa membaca data)."""
+    import pyarrow.parquet as pq
+    import pyarrow.ipc as ipc
+    if ext in PARQUET_EXTENSIONS:
+        return pq.read_schema(file_path).names
+    with ipc.open_file(file_path) as reader:
+        return reader.schema.names
+
+def _read_csv(file_path: str, schema: dict, chunksize: int = None) -> pd.DataFrame:
+    # Teks & category langsung dengan dtype skema; angka di-coerce setelahnya (nilai rusak → NaN).
+    # Dengan chunksize, skema diterapkan per chunk → puncak memori ~ satu chunk mentah.
+    read_dtypes = {col: dtype for col, dtype in schema.items() if dtype not in (None, 'float32')}
+    reader = pd.read_csv(
+        file_path, usecols=lambda c: c in schema, dtype=read_dtypes, chunksize=chunksize or None
+    )
+    if chunksize:
+        chunks = [_apply_schema(chunk, schema) for chunk in reader]
+        logger.info(f"CSV dibaca dalam {len(chunks)} chunk @ {chunksize} baris")
+        return _concat_chunks(chunks) if chunks else _apply_schema(pd.DataFrame(columns=list(schema)), schema)
+    return _apply_schema(reader, schema)
+
+def load_local_data(file_path: str, schema: dict = None, chunksize: int = None) -> "pd.DataFrame":
+    """Memuat data katalog dari file lokal (CSV, atau Parquet/Arrow sesuai ekstensi) dengan skema eksplisit.
+
+    schema    : {kolom: dtype}; default PRODUCT_SCHEMA. Kolom lain di file tidak dibaca.
+    chunksize : jika diisi, CSV dibaca bertahap per `chunksize` baris.
+    """
+    schema = PRODUCT_SCHEMA if schema is None else schema
+
     if not os.path.exists(file_path):
         logger.error(f"❌ File tidak ditemukan di: {file_path}")
         raise FileNotFoundError(f"Pastikan '{file_path}' ada di struktur proyek.")
-    
+
     try:
-        df = pd.read_csv(file_path)
+        ext = os.path.splitext(file_path)[1].lower()
+        if ext in PARQUET_EXTENSIONS + ARROW_EXTENSIONS:
+            columns = [c for c in _file_columns(file_path, ext) if c in schema]
+            reader = pd.read_parquet if ext in PARQUET_EXTENSIONS else pd.read_feather
+            df = _apply_schema(reader(file_path, columns=columns), schema)
+        else:
+            df = _read_csv(file_path, schema, chunksize)
+        logger.info(f"Data dimuat: {df.shape}, {df.memory_usage(deep=True).sum() / 1e6:.1f} MB")
         return df
     except Exception as e:
-        st.error(f"Gagal membaca CSV: {e}")
+        st.error(f"Gagal membaca data: {e}")
         return pd.DataFrame()
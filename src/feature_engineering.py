@@ -1,29 +1,127 @@
 # src/feature_engineering.py
 
+import os
 import pandas as pd
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.preprocessing import MinMaxScaler
+import scipy.sparse as sp
+from concurrent.futures import ProcessPoolExecutor
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+from sklearn.preprocessing import MinMaxScaler, normalize
 import logging
 
 logger = logging.getLogger(__name__)
 
-def create_features(df: pd.DataFrame):
-    """Membuat fitur teks (TF-IDF) dan numerik (Scaled) dari DataFrame."""
-    df = df.copy()
-    logger.info("Memulai Feature Engineering...")
-    
-    # 1. Gabungkan semua kolom teks
-    df['text_features'] = (
+TEXT_COLUMNS = ['Name', 'Description', 'Tags', 'Brand', 'Category']
+
+def build_text_features(df: pd.DataFrame) -> pd.Series:
+    """Gabungkan semua kolom teks menjadi satu dokumen per produk."""
+    return (
         df['Name'] + ' ' +
         df['Description'] + ' ' +
         df['Tags'] + ' ' +
-        df['Brand'] + ' ' +
-        df['Category']
+        df['Brand'].astype(str) + ' ' +
+        df['Category'].astype(str)
     )
 
+def _count_chunk(args):
+    """Worker process pool: tokenisasi + hitung term satu chunk dengan vocabulary lokal."""
+    texts, dtype = args
+    counter = CountVectorizer(stop_words='english', dtype=dtype)
+    try:
+        counts = counter.fit_transform(texts)
+    except ValueError:
+        # Chunk tanpa token sama sekali (mis. semua teks kosong / stop word)
+        return np.empty(0, dtype=object), sp.csr_matrix((len(texts), 0), dtype=dtype)
+    return counter.get_feature_names_out(), counts.tocsr()
+
+class ParallelTfidfVectorizer:
+    """TF-IDF paralel untuk katalog besar, keluaran sama dengan TfidfVectorizer(stop_words='english', max_features).
+
+    Tokenisasi & hitung term dijalankan per chunk di process pool (vocabulary lokal per chunk), lalu satu
+    pass global menggabungkan vocabulary, memilih `max_features` term dengan frekuensi tertinggi,
+    menghitung IDF smooth ala sklearn (ln((1+n)/(1+df)) + 1), dan normalisasi L2.
+    """
+
+    def __init__(self, max_features: int = 5000, n_jobs: int = None, chunk_size: int = 20000, dtype=np.float64):
+        self.max_features = max_features
+        self.n_jobs = n_jobs
+        self.chunk_size = chunk_size
+        self.dtype = dtype
+        self.vocabulary_ = None
+        self.idf_ = None
+
+    def _weight(self, counts: sp.csr_matrix) -> sp.csr_matrix:
+        X = counts.astype(np.float64) @ sp.diags(self.idf_)
+        return normalize(X, norm='l2', copy=False).astype(self.dtype).tocsr()
+
+    def fit_transform(self, texts) -> sp.csr_matrix:
+        texts = list(texts)
+        chunks = [texts[i:i + self.chunk_size] for i in range(0, len(texts), self.chunk_size)]
+        n_jobs = os.cpu_count() if self.n_jobs in (None, -1) else self.n_jobs
+        jobs = [(chunk, self.dtype) for chunk in chunks]
+        if len(chunks) <= 1 or n_jobs <= 1:
+            parts = [_count_chunk(job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=min(n_jobs, len(chunks))) as pool:
+                parts = list(pool.map(_count_chunk, jobs))
+
+        # Pass global 1: gabungkan vocabulary (urut alfabet seperti sklearn) dan remap kolom tiap chunk
+        terms = np.unique(np.concatenate([p[0] for p in parts])) if parts else np.empty(0, dtype=object)
+        blocks = []
+        for local_terms, counts in parts:
+            local_to_global = np.searchsorted(terms, local_terms).astype(counts.indices.dtype)
+            blocks.append(sp.csr_matrix((counts.data, local_to_global[counts.indices], counts.indptr),
+                                        shape=(counts.shape[0], len(terms))))
+        if not blocks or len(terms) == 0:
+            raise ValueError("empty vocabulary; perhaps the documents only contain stop words")
+        counts = sp.vstack(blocks).tocsr()
+
+        # Pass global 2: max_features term dengan frekuensi tertinggi → document frequency → IDF.
+        # Pemilihan sama persis dengan sklearn _limit_features, termasuk cara memecah skor seri di batas
+        # max_features: (-tfs).argsort() (quicksort default) atas vocabulary yang urut alfabet
+        term_freq = np.asarray(counts.sum(axis=0)).ravel()
+        keep = np.arange(len(terms))
+        if self.max_features is not None and len(terms) > self.max_features:
+            keep = np.sort((-term_freq).argsort()[:self.max_features])
+        counts = counts[:, keep]
+        doc_freq = np.bincount(counts.indices, minlength=counts.shape[1])
+        self.vocabulary_ = {term: i for i, term in enumerate(terms[keep])}
+        self.idf_ = np.log((1 + counts.shape[0]) / (1 + doc_freq)) + 1
+        return self._weight(counts)
+
+    def transform(self, texts) -> sp.csr_matrix:
+        counter = CountVectorizer(stop_words='english', vocabulary=self.vocabulary_, dtype=self.dtype)
+        return self._weight(counter.transform(texts).tocsr())
+
+def _make_vectorizer(dtype, n_jobs):
+    """n_jobs=None → TfidfVectorizer single-core; selain itu ParallelTfidfVectorizer (-1 = semua core)."""
+    if n_jobs is None:
+        return TfidfVectorizer(stop_words='english', max_features=5000, dtype=dtype)
+    return ParallelTfidfVectorizer(max_features=5000, n_jobs=n_jobs, dtype=dtype)
+
+def create_features(df: pd.DataFrame, return_vectorizer: bool = False, compact: bool = False, n_jobs: int = None):
+    """Membuat fitur teks (TF-IDF) dan numerik (Scaled) dari DataFrame.
+
+    Jika return_vectorizer=True, vectorizer yang sudah di-fit ikut dikembalikan
+    (untuk disimpan di artifact store / transform data baru).
+
+    compact=True: TF-IDF CSR float32, teks gabungan tidak disimpan, dan fitur numerik
+    [Rating_scaled, ReviewCount_scaled_log] dikembalikan sebagai array float32 (N, 2) terpisah
+    tanpa menambah kolom ke katalog → (df, tfidf_matrix, numeric_features[, vectorizer]).
+
+    n_jobs: jika diisi, TF-IDF dihitung paralel per chunk (ParallelTfidfVectorizer) untuk katalog besar.
+    """
+    logger.info("Memulai Feature Engineering...")
+    if compact:
+        return _create_compact_features(df, return_vectorizer, n_jobs)
+
+    df = df.copy()
+    
+    # 1. Gabungkan semua kolom teks
+    df['text_features'] = build_text_features(df)
+
     # 2. TF-IDF vectorization
-    vectorizer = TfidfVectorizer(stop_words='english', max_features=5000)
+    vectorizer = _make_vectorizer(np.float64, n_jobs)
     tfidf_matrix = vectorizer.fit_transform(df['text_features'])
     logger.info(f"TF-IDF matrix shape: {tfidf_matrix.shape}")
 
@@ -38,4 +136,26 @@ def create_features(df: pd.DataFrame):
     df['ReviewCount_scaled_log'] = df['review_log'] / df['review_log'].max()
     
     logger.info("Feature Engineering selesai.")
-    return df, tfidf_matrix
\ No newline at end of file
+    if return_vectorizer:
+        return df, tfidf_matrix, vectorizer
+    return df, tfidf_matrix
+
+def _create_compact_features(df: pd.DataFrame, return_vectorizer: bool, n_jobs: int):
+    """Versi hemat memori create_features (lihat compact=True)."""
+    # 1-2. TF-IDF float32; teks gabungan hanya hidup selama fit
+    vectorizer = _make_vectorizer(np.float32, n_jobs)
+    tfidf_matrix = vectorizer.fit_transform(build_text_features(df)).tocsr()
+    logger.info(f"TF-IDF matrix shape: {tfidf_matrix.shape} ({tfidf_matrix.dtype})")
+
+    # 3. Fitur numerik dalam array terpisah (rumus sama dengan mode biasa)
+    rating = df['Rating'].to_numpy(dtype=np.float64)
+    review_log = np.log1p(df['ReviewCount'].to_numpy(dtype=np.float64))
+    rating_range = rating.max() - rating.min()
+    numeric_features = np.empty((len(df), 2), dtype=np.float32)
+    numeric_features[:, 0] = (rating - rating.min()) / rating_range if rating_range > 0 else 0.0
+    numeric_features[:, 1] = review_log / review_log.max()
+
+    logger.info("Feature Engineering selesai.")
+    if return_vectorizer:
+        return df, tfidf_matrix, numeric_features, vectorizer
+    return df, tfidf_matrix, numeric_features
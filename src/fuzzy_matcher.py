@@ -0,0 +1,81 @@
+# src/fuzzy_matcher.py
+
+import numpy as np
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from difflib import SequenceMatcher, get_close_matches
+import logging
+
+logger = logging.getLogger(__name__)
+
+def padded_ngrams(text: str, n: int = 3) -> set:
+    """N-gram karakter dari teks dengan spasi di awal/akhir (awal & akhir kata ikut berbobot)."""
+    text = f" {text} "
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+class FuzzyMatcher(ABC):
+    """Antarmuka matcher fuzzy: match(query, k) → list (posisi, skor 0-1) terurut menurun."""
+
+    @abstractmethod
+    def match(self, query: str, k: int = 5, cutoff: float = None) -> list:
+        ...
+
+class TrigramMatcher(FuzzyMatcher):
+    """Fuzzy match berbasis index trigram: skor Dice 2|A∩B| / (|A|+|B|), dihitung vektor lewat bincount."""
+
+    def __init__(self, names, ngram: int = 3, cutoff: float = 0.3, postings: dict = None):
+        self.names = names
+        self.ngram = ngram
+        self.cutoff = cutoff
+        if postings is None:
+            buckets = defaultdict(list)
+            for pos, name in enumerate(names):
+                for gram in padded_ngrams(name, ngram):
+                    buckets[gram].append(pos)
+            postings = {g: np.asarray(rows, dtype=np.int64) for g, rows in buckets.items()}
+        self.postings = postings
+        # Jumlah n-gram unik per nama (penyebut skor Dice)
+        self.gram_counts = np.bincount(
+            np.concatenate(list(postings.values())) if postings else np.empty(0, dtype=np.int64),
+            minlength=len(names)
+        )
+        self.gram_counts.flags.writeable = False
+
+    def match(self, query: str, k: int = 5, cutoff: float = None) -> list:
+        cutoff = self.cutoff if cutoff is None else cutoff
+        query_grams = padded_ngrams(query, self.ngram)
+        lists = [self.postings[g] for g in query_grams if g in self.postings]
+        if not lists:
+            return []
+        shared = np.bincount(np.concatenate(lists), minlength=len(self.names))
+        candidates = np.flatnonzero(shared)
+        scores = 2.0 * shared[candidates] / (len(query_grams) + self.gram_counts[candidates])
+
+        keep = scores >= cutoff
+        candidates, scores = candidates[keep], scores[keep]
+        if len(candidates) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            candidates, scores = candidates[top], scores[top]
+        order = np.lexsort((candidates, -scores))
+        return [(int(candidates[i]), float(scores[i])) for i in order]
+
+class DifflibMatcher(FuzzyMatcher):
+    """Perilaku lama (difflib.get_close_matches); lambat, hanya untuk katalog kecil/perbandingan."""
+
+    def __init__(self, names, cutoff: float = 0.4):
+        self.names = list(names)
+        self.cutoff = cutoff
+        self.first_pos = {}
+        for pos, name in enumerate(self.names):
+            self.first_pos.setdefault(name, pos)
+
+    def match(self, query: str, k: int = 5, cutoff: float = None) -> list:
+        cutoff = self.cutoff if cutoff is None else cutoff
+        closest = get_close_matches(query, self.names, n=k, cutoff=cutoff)
+        matcher = SequenceMatcher()
+        matcher.set_seq2(query)
+        results = []
+        for name in closest:
+            matcher.set_seq1(name)
+            results.append((self.first_pos[name], matcher.ratio()))
+        return results
@@ -0,0 +1,130 @@
+# src/incremental.py
+
+import pandas as pd
+import numpy as np
+import scipy.sparse as sp
+import logging
+from src.preprocessing import fill_missing
+from src.feature_engineering import TEXT_COLUMNS, build_text_features
+from src.modelling import NUMERIC_FEATURE_COLUMNS, NeighborIndex, compute_numeric_angles, compute_neighbors, hybrid_similarity, select_top_n
+
+logger = logging.getLogger(__name__)
+
+def _linear_scaling(raw: np.ndarray, scaled: np.ndarray):
+    """Ambil kembali (slope, intercept) scaler yang sudah dipakai: scaled = slope * raw + intercept."""
+    lo, hi = int(np.argmin(raw)), int(np.argmax(raw))
+    if raw[hi] == raw[lo]:
+        return 0.0, float(scaled[lo])
+    slope = (scaled[hi] - scaled[lo]) / (raw[hi] - raw[lo])
+    return float(slope), float(scaled[lo] - slope * raw[lo])
+
+def _prepare_rows(rows: pd.DataFrame, df: pd.DataFrame, numeric_features: np.ndarray = None):
+    """Cleaning + fitur numerik untuk baris baru memakai statistik & scaler katalog yang sudah ada.
+
+    Mengembalikan (rows, numeric_rows) dengan numeric_rows array (M, 2) [Rating_scaled, ReviewCount_scaled_log].
+    """
+    rows = rows.copy()
+    for col in TEXT_COLUMNS:
+        rows[col] = fill_missing(rows[col], 'Unknown' if col in ('Brand', 'Category') else '')
+    rows['ReviewCount'] = rows['ReviewCount'].fillna(0)
+
+    # Rating kosong/0 → rata-rata Brand di katalog → rata-rata global katalog
+    rows['Rating'] = rows['Rating'].replace(0, np.nan)
+    brand_mean = df.groupby('Brand', observed=True)['Rating'].mean()
+    rows['Rating'] = rows['Rating'].fillna(rows['Brand'].map(brand_mean)).fillna(df['Rating'].mean())
+
+    # Scaler yang sama dengan create_features (tanpa refit), dari kolom df atau array compact
+    reference = df[NUMERIC_FEATURE_COLUMNS].to_numpy() if numeric_features is None else np.asarray(numeric_features)
+    raw = [df['Rating'].to_numpy(dtype=np.float64), np.log1p(df['ReviewCount'].to_numpy(dtype=np.float64))]
+    new_raw = [rows['Rating'].to_numpy(dtype=np.float64), np.log1p(rows['ReviewCount'].to_numpy(dtype=np.float64))]
+    numeric_rows = np.empty((len(rows), 2), dtype=reference.dtype)
+    for j in range(2):
+        slope, intercept = _linear_scaling(raw[j], reference[:, j].astype(np.float64))
+        numeric_rows[:, j] = slope * new_raw[j] + intercept
+
+    if numeric_features is None:
+        # Mode biasa: kolom bantu create_features ikut diisi
+        slope, intercept = _linear_scaling(df['ReviewCount'].to_numpy(dtype=np.float64),
+                                           df['ReviewCount_scaled'].to_numpy(dtype=np.float64))
+        rows['ReviewCount_scaled'] = slope * rows['ReviewCount'] + intercept
+        rows['review_log'] = new_raw[1]
+        rows[NUMERIC_FEATURE_COLUMNS] = numeric_rows
+        rows['text_features'] = build_text_features(rows)
+    return rows, numeric_rows
+
+def apply_catalogue_delta(df: pd.DataFrame, tfidf_matrix, neighbor_index: NeighborIndex, vectorizer,
+                          upserts: pd.DataFrame = None, removed_ids=None, block_size: int = 256,
+                          numeric_features: np.ndarray = None):
+    """Update katalog secara inkremental tanpa refit TF-IDF / rebuild index penuh.
+
+    - upserts     : baris produk baru atau yang berubah (kolom mentah seperti CSV, wajib ada ProdID)
+    - removed_ids : ProdID yang dihapus
+
+    Baris yang berubah diperlakukan sebagai hapus + tambah (dipindah ke akhir katalog).
+    Baris baru di-transform dengan vectorizer yang sudah di-fit; hanya neighbor list baris baru,
+    serta baris lama yang kehilangan tetangga, yang dihitung ulang penuh. Baris lama lainnya cukup
+    digabung dengan skor terhadap baris baru. Mengembalikan (df, tfidf_matrix, neighbor_index) baru,
+    ditambah numeric_features baru jika katalog dibuat dengan create_features(compact=True).
+    """
+    upserts = upserts if upserts is not None else df.iloc[:0]
+    removed = set(removed_ids or []) | set(upserts['ProdID'])
+    keep = ~df['ProdID'].isin(removed).to_numpy()
+    n_keep, n_new = int(keep.sum()), len(upserts)
+    logger.info(f"Update inkremental: {len(df) - n_keep} dihapus/diubah, {n_new} ditambah/diubah")
+
+    # 1. Katalog & TF-IDF baru: baris lama yang tersisa + baris baru (transform, bukan fit)
+    new_rows, numeric_rows = _prepare_rows(upserts, df, numeric_features)
+    new_df = pd.concat([df[keep], new_rows[df.columns.intersection(new_rows.columns)]], ignore_index=True)
+    blocks = [sp.csr_matrix(tfidf_matrix)[np.flatnonzero(keep)]]
+    if n_new:
+        blocks.append(vectorizer.transform(build_text_features(new_rows)).astype(tfidf_matrix.dtype))
+    new_tfidf = sp.vstack(blocks).tocsr()
+    if numeric_features is None:
+        numeric = compute_numeric_angles(new_df)
+    else:
+        new_numeric = np.vstack([np.asarray(numeric_features)[keep], numeric_rows])
+        numeric = compute_numeric_angles(new_numeric)
+
+    def _result(index: NeighborIndex):
+        if numeric_features is None:
+            return new_df, new_tfidf, index
+        return new_df, new_tfidf, index, new_numeric
+
+    # 2. Posisi lama → posisi baru (-1 jika dihapus), lalu remap neighbor list lama
+    remap = np.full(len(df) + 1, -1, dtype=np.int64)   # slot terakhir untuk padding -1
+    remap[np.flatnonzero(keep)] = np.arange(n_keep)
+    old_idx = remap[np.asarray(neighbor_index.indices)[keep]]
+    old_scores = np.where(old_idx >= 0, np.asarray(neighbor_index.scores)[keep], -np.inf).astype(np.float32)
+
+    n_total = n_keep + n_new
+    k = max(min(neighbor_index.indices.shape[1], n_total - 1), 0)
+    indices = np.full((n_total, k), -1, dtype=np.int64)
+    scores = np.full((n_total, k), -np.inf, dtype=np.float32)
+    if k == 0:
+        return _result(NeighborIndex(indices, scores))
+
+    # 3. Baris lama: gabungkan top-K lama dengan skor terhadap baris baru saja
+    new_pos = np.arange(n_keep, n_total)
+    for start in range(0, n_keep, block_size):
+        stop = min(start + block_size, n_keep)
+        cand_idx = old_idx[start:stop]
+        cand_scores = old_scores[start:stop]
+        if n_new:
+            new_scores = hybrid_similarity(new_tfidf, numeric, np.arange(start, stop), new_pos)
+            cand_idx = np.hstack([cand_idx, np.broadcast_to(new_pos, new_scores.shape)])
+            cand_scores = np.hstack([cand_scores, new_scores])
+        top, top_scores = select_top_n(cand_scores, k)
+        indices[start:stop] = np.where(np.isfinite(top_scores), np.take_along_axis(cand_idx, top, axis=1), -1)
+        scores[start:stop] = top_scores
+
+    # 4. Hitung ulang penuh: baris baru + baris lama yang tetangganya ikut terhapus
+    old_valid = (old_idx >= 0).sum(axis=1)
+    expected = min(neighbor_index.indices.shape[1], len(df) - 1)
+    affected = np.flatnonzero(old_valid < expected)
+    recompute = np.concatenate([affected, new_pos])
+    for start in range(0, len(recompute), block_size):
+        rows = recompute[start:start + block_size]
+        indices[rows], scores[rows] = compute_neighbors(new_tfidf, numeric, rows, k)
+
+    logger.info(f"Neighbor list dihitung ulang penuh: {len(recompute)} baris")
+    return _result(NeighborIndex(indices, scores))
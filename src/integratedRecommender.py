@@ -2,65 +2,234 @@
 
 import pandas as pd
 import numpy as np
-from difflib import get_close_matches
+import scipy.sparse as sp
 import logging
+from src.modelling import NeighborIndex, select_top_n
+from src.name_lookup import NameLookupIndex, normalize_name
 
 logger = logging.getLogger(__name__)
 
+# Kolom yang dibutuhkan kartu produk / evaluasi LLM (urutan sesuai tampilan)
+DISPLAY_COLUMNS = ['Name','Brand','Category','Rating','ReviewCount','final_score','Description','ImageURL']
+
+def _read_only(arr) -> np.ndarray:
+    """Tandai array sebagai read-only agar tidak bisa diubah oleh request mana pun."""
+    arr = np.asarray(arr)
+    arr.flags.writeable = False
+    return arr
+
+def _min_max_normalize(values: pd.Series):
+    """(min, max) global dan vektor ternormalisasi 0-1 (contiguous, read-only)."""
+    arr = values.to_numpy(dtype=np.float64, copy=True)
+    lo, hi = float(arr.min()), float(arr.max())
+    norm = (arr - lo) / (hi - lo) if hi > lo else np.zeros_like(arr)
+    return (lo, hi), _read_only(np.ascontiguousarray(norm))
+
 class IntegratedRecommender:
-    def __init__(self, df: pd.DataFrame, hybrid_sim: np.ndarray):
+    """Recommender hybrid berbasis neighbor index.
+
+    Semua struktur katalog (neighbor index, name index, array rating/review) dibangun sekali
+    dan read-only; query tidak pernah menulis ke `self.df`. Satu instance (st.cache_resource)
+    aman dipakai bersama oleh banyak sesi/thread. `df` tidak boleh diubah setelah konstruksi.
+    """
+
+    def __init__(self, df: pd.DataFrame, neighbor_index: NeighborIndex, vectorizer=None, tfidf_matrix=None, ann=None,
+                 search_index=None, tfidf_csc=None, fuzzy_matcher=None, name_index=None):
+        """vectorizer + tfidf_matrix (hasil create_features) opsional: mengaktifkan pencarian teks bebas
+        (search_ids). tfidf_csc: matriks yang sama dalam format CSC (mis. memmap dari artifact bundle);
+        jika tidak diberikan, dibangun dari tfidf_matrix (salinan di heap proses ini).
+        ann (HybridANNIndex yang sudah di-fit) opsional: kandidat teks bebas dari ANN.
+        search_index (SearchIndex) opsional: pencarian keyword BM25 dengan prefix (keyword_search_ids).
+        fuzzy_matcher (FuzzyMatcher) opsional, diteruskan ke NameLookupIndex (default TrigramMatcher).
+        Matcher harus dibangun atas nama yang sudah dinormalisasi dengan urutan baris katalog, mis.
+        DifflibMatcher(df['Name'].fillna('').map(normalize_name)), karena query di-strip + lowercase
+        sebelum dicocokkan dan posisi hasil match dipakai langsung sebagai baris df.
+        name_index (NameLookupIndex atas df['Name'], mis. dari artifact bundle) opsional: dipakai apa adanya
+        (fuzzy_matcher diabaikan) sehingga warm start tidak membangun ulang index nama."""
         self.df = df
-        self.hybrid_sim = hybrid_sim
+        self.neighbor_index = NeighborIndex(_read_only(neighbor_index.indices), _read_only(neighbor_index.scores))
+        # Konstanta normalisasi global & vektor rating/review ternormalisasi (0-1), dihitung sekali
+        self.rating_range, self.rating_norm = _min_max_normalize(df['Rating'])
+        self.review_range, self.review_norm = _min_max_normalize(df['ReviewCount'])
+        # Posisi kolom tampilan (tanpa final_score) untuk satu kali gather iloc
+        display_columns = [c for c in DISPLAY_COLUMNS if c != 'final_score']
+        self._display_positions = df.columns.get_indexer(display_columns)
+        missing = [c for c, pos in zip(display_columns, self._display_positions) if pos < 0]
+        if missing:
+            raise KeyError(f"Kolom tampilan tidak ada di katalog: {missing}")
+        # Index nama dibangun sekali, bukan per request (atau dimuat dari artifact bundle)
+        if name_index is None:
+            name_index = NameLookupIndex(df['Name'], fuzzy_matcher=fuzzy_matcher)
+        elif len(name_index.names) != len(df):
+            raise ValueError(f"name_index berisi {len(name_index.names)} nama, katalog {len(df)} baris")
+        self.name_index = name_index
+        # Pencarian teks bebas: kolom TF-IDF (CSC) → skor query hanya menyentuh posting term query
+        self.vectorizer = vectorizer
+        self.ann = ann
+        self.tfidf_matrix = tfidf_matrix
+        self._tfidf_csc = None
+        self.search_index = search_index
+        if vectorizer is not None and tfidf_matrix is not None:
+            self._tfidf_csc = sp.csc_matrix(tfidf_matrix) if tfidf_csc is None else tfidf_csc
+            for arr in (self._tfidf_csc.data, self._tfidf_csc.indices, self._tfidf_csc.indptr):
+                arr.flags.writeable = False
+
+    def resolve_product(self, product_name: str):
+        """Cari produk acuan lewat name index (exact → partial → fuzzy) → (posisi, jenis match) atau None."""
+        return self.name_index.lookup(product_name)
+
+    def suggest_products(self, product_name: str, k: int = 5) -> pd.DataFrame:
+        """Kandidat "did you mean" dari fuzzy matcher, lengkap dengan skor kemiripan nama."""
+        matches = self.name_index.suggest(product_name, k=k)
+        suggestions = self.df.iloc[[pos for pos, _ in matches]][['Name', 'Brand', 'Category']].copy()
+        suggestions['match_score'] = [score for _, score in matches]
+        return suggestions
+
+    def _rank_candidates(self, anchors: np.ndarray, n: int):
+        """Inti scoring untuk (A,) anchor → (item_idx, similarity, final_score) berbentuk (A, n).
+
+        Slot yang tidak terisi bernilai item -1 dan skor -inf.
+        """
+        # 1. Kandidat dari neighbor index; anchor & padding dikeluarkan berdasarkan indeks, bukan posisi [1:]
+        cand_idx = self.neighbor_index.indices[anchors]
+        sims = np.where((cand_idx >= 0) & (cand_idx != anchors[:, None]), self.neighbor_index.scores[anchors], -np.inf)
+        top, top_sims = select_top_n(sims, n + 20) # ambil lebih banyak kandidat
+        top_idx = np.take_along_axis(cand_idx, top, axis=1)
+        return self._blend(top_idx, top_sims, n)
+
+    def _blend(self, top_idx: np.ndarray, top_sims: np.ndarray, n: int):
+        """Final score kandidat (A, m) lalu top-n → (item_idx, similarity, final_score) berbentuk (A, n)."""
+        # 2. Final Score: 40% Similarity + 30% Rating + 30% Review (gather vektor ternormalisasi)
+        safe_idx = np.where(top_idx >= 0, top_idx, 0)
+        final = 0.4 * top_sims + 0.3 * self.rating_norm[safe_idx] + 0.3 * self.review_norm[safe_idx]
+        final[~np.isfinite(top_sims)] = -np.inf
+
+        # 3. Top-n per anchor berdasarkan final score
+        best, best_scores = select_top_n(final, n)
+        item_idx = np.take_along_axis(top_idx, best, axis=1)
+        item_idx[~np.isfinite(best_scores)] = -1
+        return item_idx, np.take_along_axis(top_sims, best, axis=1), best_scores
+
+    def recommend_ids(self, item_idx: int, n: int = 5):
+        """API level rendah: rekomendasi untuk posisi baris produk → (indices, final_scores) NumPy."""
+        items, _, scores = self._rank_candidates(np.array([item_idx], dtype=np.int64), n)
+        valid = items[0] >= 0
+        return items[0][valid], scores[0][valid]
+
+    def search_ids(self, query: str, n: int = 5):
+        """Pencarian teks bebas tanpa produk acuan → (indices, final_scores) NumPy.
+
+        Query di-transform dengan vectorizer TF-IDF yang sama, dinilai ke semua produk lewat
+        mat-vec sparse (hanya kolom term query), lalu dicampur rating/review seperti rekomendasi biasa.
+        """
+        if self._tfidf_csc is None:
+            raise ValueError("Pencarian teks bebas butuh vectorizer dan tfidf_matrix.")
+        query_vec = self.vectorizer.transform([str(query)]).tocsr()
+        if query_vec.nnz == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        if self.ann is not None:
+            # Kandidat dari ANN (sub-linear), skor konten dihitung ulang eksak
+            cand, _ = self.ann.query(query_vec, n + 20)
+            cand = cand[0][cand[0] >= 0]
+            sims = np.asarray(self.tfidf_matrix[cand] @ query_vec.T.toarray()).ravel()
+        else:
+            sims_all = self._tfidf_csc[:, query_vec.indices] @ query_vec.data
+            cand = np.flatnonzero(sims_all > 0)
+            sims = sims_all[cand]
+        top, top_sims = select_top_n(sims[None, :], n + 20)
+        top_idx = cand[top]
+        top_sims = np.where(top_sims > 0, top_sims, -np.inf)
+
+        items, _, scores = self._blend(top_idx, top_sims, n)
+        valid = items[0] >= 0
+        return items[0][valid], scores[0][valid]
+
+    def keyword_search_ids(self, query: str, n: int = 5):
+        """Pencarian keyword lewat inverted index (BM25, prefix match) → (indices, final_scores) NumPy.
+
+        Semua token wajib cocok (AND); jika kosong, cukup salah satu (OR). Skor BM25 dinormalisasi
+        terhadap hasil teratas lalu dicampur rating/review seperti rekomendasi biasa.
+        """
+        if self.search_index is None:
+            raise ValueError("Pencarian keyword butuh search_index.")
+        docs, scores = self.search_index.search(query, n + 20, operator='and', prefix=True)
+        if len(docs) == 0:
+            docs, scores = self.search_index.search(query, n + 20, operator='or', prefix=True)
+        if len(docs) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        sims = (scores / scores[0]) if scores[0] > 0 else np.zeros_like(scores)
+        items, _, final = self._blend(docs[None, :], sims[None, :].astype(np.float64), n)
+        valid = items[0] >= 0
+        return items[0][valid], final[0][valid]
 
     def get_recommendations(self, product_name: str, n: int = 5):
         """Fungsi rekomendasi hybrid utama (digunakan dalam UI/CLI)."""
-        product_name = product_name.strip().lower()
-        self.df['Name_norm'] = self.df['Name'].str.strip().str.lower()
-        
         # 1. Cari produk acuan (termasuk fuzzy match)
-        idx = None
-        if product_name in self.df['Name_norm'].values:
-            idx = self.df[self.df['Name_norm'] == product_name].index[0]
-        else:
-            # Cari yang mengandung kata kunci (partial match)
-            matches = self.df[self.df['Name_norm'].str.contains(product_name, case=False, na=False)]
-            if len(matches) > 0:
-                idx = matches.index[0]
-                logger.info(f"🔍 Produk mirip ditemukan (Partial Match): {self.df.iloc[idx]['Name']}")
+        match = self.resolve_product(product_name)
+        if (match is None or match[1] == "fuzzy") and self._tfidf_csc is not None:
+            # Nama tidak cocok langsung → cari sebagai teks bebas dulu, fuzzy nama hanya jika tidak ada hasil
+            indices, scores = self.search_ids(product_name, n)
+            if len(indices):
+                logger.info(f"🔍 Pencarian teks bebas: '{product_name}' → {len(indices)} produk")
+                return self.display_frame(indices, scores)
+        if (match is None or match[1] == "fuzzy") and self.search_index is not None:
+            # Kata belum lengkap ("shamp") tidak dikenal TF-IDF → keyword dengan prefix match
+            indices, scores = self.keyword_search_ids(product_name, n)
+            if len(indices):
+                logger.info(f"🔍 Pencarian keyword: '{product_name}' → {len(indices)} produk")
+                return self.display_frame(indices, scores)
+        if match is None:
+            return f"❌ Produk '{normalize_name(product_name)}' tidak ditemukan di dataset."
+        idx, match_type = match
+        if match_type == "partial":
+            logger.info(f"🔍 Produk mirip ditemukan (Partial Match): {self.df.iloc[idx]['Name']}")
+        elif match_type == "fuzzy":
+            logger.info(f"🔍 Produk tidak ditemukan persis. Menampilkan hasil mirip (Fuzzy Match): {self.df.iloc[idx]['Name']}")
+
+        # 2. Ranking murni NumPy, lalu ambil kolom tampilan hanya untuk n baris final
+        indices, scores = self.recommend_ids(idx, n)
+        return self.display_frame(indices, scores)
+
+    def display_frame(self, indices: np.ndarray, scores: np.ndarray) -> pd.DataFrame:
+        """Layer tampilan: kolom untuk kartu UI hanya untuk baris hasil akhir."""
+        recommended = self.df.iloc[indices, self._display_positions]
+        recommended.insert(DISPLAY_COLUMNS.index('final_score'), 'final_score', scores)
+        return recommended
+
+    def get_recommendations_batch(self, products, n: int = 5) -> pd.DataFrame:
+        """Rekomendasi untuk banyak produk acuan sekaligus (nama atau posisi baris/int).
+
+        Semua kandidat dinilai dalam satu operasi matriks (A, K). Hasil berupa DataFrame
+        long-format: satu baris per (anchor, rank). Anchor yang tidak ditemukan dilewati.
+        """
+        # 1. Resolusi anchor: int → posisi baris langsung, string → name index
+        anchor_pos, anchor_query = [], []
+        for query in products:
+            if isinstance(query, (int, np.integer)):
+                pos = int(query) if 0 <= query < len(self.df) else None
             else:
-                # Cari yang paling mirip (close match)
-                closest = get_close_matches(product_name, self.df['Name_norm'], n=1, cutoff=0.4)
-                if closest:
-                    idx = self.df[self.df['Name_norm'] == closest[0]].index[0]
-                    logger.info(f"🔍 Produk tidak ditemukan persis. Menampilkan hasil mirip (Fuzzy Match): {self.df.iloc[idx]['Name']}")
-                else:
-                    return f"❌ Produk '{product_name}' tidak ditemukan di dataset."
-
-        # 2. Ambil skor similarity
-        sim_scores = list(enumerate(self.hybrid_sim[idx]))
-        sim_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)[1:n+20] # ambil lebih banyak kandidat
-
-        # 3. Hitung Final Score
-        results = self.df.iloc[[i[0] for i in sim_scores]].copy()
-        results['similarity'] = [s[1] for s in sim_scores]
-
-        # Normalisasi ulang rating & review agar 0-1 (untuk final score)
-        min_rating, max_rating = self.df['Rating'].min(), self.df['Rating'].max()
-        min_review, max_review = self.df['ReviewCount'].min(), self.df['ReviewCount'].max()
-
-        results['rating_norm'] = (results['Rating'] - min_rating) / (max_rating - min_rating)
-        results['review_norm'] = (results['ReviewCount'] - min_review) / (max_review - min_review)
-
-        # Final Score: 40% Similarity + 30% Rating + 30% Review
-        results['final_score'] = (
-            0.4 * results['similarity'] +
-            0.3 * results['rating_norm'] +
-            0.3 * results['review_norm']
-        )
-
-        # 4. Urutkan dan ambil top-n
-        results = results.sort_values('final_score', ascending=False)
-        # recommended = results[['Name','Brand','Category','Rating','ReviewCount','final_score','Description']].head(n)
-        recommended = results[['Name','Brand','Category','Rating','ReviewCount','final_score','Description','ImageURL']].head(n)
-        
-        return recommended
\ No newline at end of file
+                match = self.resolve_product(query)
+                pos = match[0] if match else None
+            if pos is None:
+                logger.warning(f"Produk acuan '{query}' tidak ditemukan, dilewati.")
+                continue
+            anchor_pos.append(pos)
+            anchor_query.append(query)
+        anchors = np.asarray(anchor_pos, dtype=np.int64)
+
+        # 2. Semua anchor dinilai sekaligus
+        item_idx, item_sims, final = self._rank_candidates(anchors, n)
+
+        valid = item_idx >= 0
+        rows, ranks = np.nonzero(valid)
+        items = item_idx[valid]
+        return pd.DataFrame({
+            'anchor': np.asarray(anchor_query, dtype=object)[rows] if len(rows) else np.empty(0, dtype=object),
+            'anchor_idx': anchors[rows],
+            'rank': ranks + 1,
+            'item_idx': items,
+            'Name': self.df['Name'].to_numpy()[items],
+            'similarity': item_sims[valid],
+            'final_score': final[valid],
+        })
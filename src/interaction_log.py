@@ -0,0 +1,251 @@
+# src/interaction_log.py
+
+import os
+import time
+import queue
+import sqlite3
+import threading
+try:
+    import fcntl
+except ImportError:   # Windows
+    fcntl = None
+    import msvcrt
+import numpy as np
+import pandas as pd
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Event implisit → rating semu (skala 1-5) untuk matriks user-item CF; 'search' tidak punya produk
+EVENT_RATINGS = {'view': 3.0, 'cart': 5.0}
+
+class InteractionLog:
+    """Log event interaksi append-only di SQLite.
+
+    log() hanya memasukkan event ke antrean di memori (tidak pernah menunggu I/O); thread latar
+    menulis antrean ke disk per batch (executemany dalam satu transaksi) setiap `flush_interval`
+    detik atau begitu `batch_size` event terkumpul.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 2.0, batch_size: int = 500):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS events ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, ts REAL NOT NULL, session_id TEXT NOT NULL, "
+                "event TEXT NOT NULL, prod_id TEXT, query TEXT)"
+            )
+        self._writer = threading.Thread(target=self._run, name="interaction-log-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def log(self, event: str, session_id: str, prod_id=None, query: str = None):
+        """Catat satu event ('view', 'cart', 'search'); non-blocking."""
+        prod_id = None if prod_id is None else str(prod_id)
+        self._queue.put((time.time(), str(session_id), event, prod_id, query))
+
+    def _drain(self, block: bool):
+        """Ambil satu batch dari antrean. block=True: tampung sampai `flush_interval` detik berlalu atau
+        `batch_size` event terkumpul (mana yang lebih dulu); block=False: ambil yang ada saja."""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        try:
+            while len(batch) < self.batch_size:
+                if not block:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                batch.append(self._queue.get(timeout=remaining))
+        except queue.Empty:
+            pass
+        return batch
+
+    def _write(self, conn, batch):
+        if not batch:
+            return
+        try:
+            with conn:
+                conn.executemany("INSERT INTO events (ts, session_id, event, prod_id, query) VALUES (?, ?, ?, ?, ?)", batch)
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def _run(self):
+        conn = self._connect()
+        try:
+            while not self._stop.is_set():
+                try:
+                    self._write(conn, self._drain(block=True))
+                except sqlite3.Error as e:
+                    logger.warning(f"Gagal menulis interaction log: {e}")
+            # Tulis sisa antrean sebelum berhenti
+            while not self._queue.empty():
+                self._write(conn, self._drain(block=False))
+        finally:
+            conn.close()
+
+    def flush(self):
+        """Tunggu sampai semua event yang sudah di-log tertulis ke disk."""
+        self._queue.join()
+
+    def close(self):
+        self._stop.set()
+        self._writer.join()
+
+    def read_events(self, after_id: int = 0, event_types=None) -> pd.DataFrame:
+        """Event dengan id > after_id (urut id) sebagai DataFrame."""
+        sql = "SELECT id, ts, session_id, event, prod_id, query FROM events WHERE id > ?"
+        params = [after_id]
+        if event_types:
+            sql += f" AND event IN ({','.join('?' * len(event_types))})"
+            params += list(event_types)
+        with self._connect() as conn:
+            return pd.read_sql_query(sql + " ORDER BY id", conn, params=params)
+
+def events_to_interactions(events: pd.DataFrame, prod_ids) -> pd.DataFrame:
+    """Event produk → baris interaksi CF (user_id = session_id, rating = EVENT_RATINGS, diambil yang
+    tertinggi per (sesi, produk) dalam `events`; lintas pemanggilan dijaga oleh
+    refresh_from_interactions(keep_highest=True)). prod_id di log disimpan sebagai teks; dikembalikan ke nilai asli
+    ProdID katalog lewat `prod_ids`, event untuk produk yang tidak dikenal dibuang."""
+    events = events[events['event'].isin(list(EVENT_RATINGS)) & events['prod_id'].notna()]
+    prod_ids = pd.Index(prod_ids)
+    lookup = pd.Series(np.arange(len(prod_ids)), index=prod_ids.astype(str))
+    lookup = lookup[~lookup.index.duplicated()]
+    pos = events['prod_id'].map(lookup)
+    known = pos.notna().to_numpy()
+    interactions = pd.DataFrame({
+        'user_id': events['session_id'].to_numpy()[known],
+        'prod_id': prod_ids[pos[known].to_numpy(dtype=np.int64)],
+        'rating': events['event'].map(EVENT_RATINGS).to_numpy(dtype=np.float32)[known],
+    })
+    return interactions.groupby(['user_id', 'prod_id'], as_index=False, sort=False)['rating'].max()
+
+def _try_lock(path: str):
+    """Kunci file eksklusif tanpa menunggu → handle file (lepas dengan close) atau None jika dipegang proses lain.
+
+    Kunci OS otomatis lepas saat proses mati, jadi tidak ada lock basi setelah crash.
+    """
+    handle = open(path, 'a+')
+    try:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        return handle
+    except OSError:
+        handle.close()
+        return None
+
+class InteractionConsolidator:
+    """Thread latar yang secara berkala membaca event baru dari InteractionLog dan memasukkannya ke
+    CollaborativeFilteringRecommender (popularitas + matriks user-item + similarity).
+
+    Hanya satu proses per log yang boleh mengkonsolidasi (kunci file `lock_path`, default
+    `<log>.consolidator.lock`). Dengan `store` (ArtifactStore) dan `model_key`, pemegang kunci
+    menerbitkan model hasil konsolidasi sebagai bundle `<model_key>-cf-<last_event_id>` lalu ikut
+    memakai versi memmap-nya; replica lain setiap `interval` mencoba mengambil kunci (mengambil alih
+    jika pemegangnya mati) dan memuat bundle terbaru, sehingga semua replica memakai data nyata yang
+    sama dengan satu salinan fisik similarity di page cache.
+    """
+
+    def __init__(self, interaction_log: InteractionLog, recommender, interval: float = 60.0, lock_path: str = None,
+                 store=None, model_key: str = None, keep_published: int = 2):
+        self.interaction_log = interaction_log
+        self.recommender = recommender
+        self.interval = interval
+        self.lock_path = lock_path or f"{interaction_log.path}.consolidator.lock"
+        self.store = store
+        self.model_prefix = f"{model_key}-cf-" if model_key else None
+        self.keep_published = keep_published
+        self.last_event_id = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock_handle = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._lock_handle is not None
+
+    def _published_keys(self) -> list:
+        # last_event_id di-pad nol → urutan nama = urutan event
+        if self.store is None or self.model_prefix is None:
+            return []
+        return self.store.keys(self.model_prefix)
+
+    def _publish(self):
+        """Simpan model CF ke store lalu pasang versi memmap-nya (heap salinan hasil refresh dilepas)."""
+        key = f"{self.model_prefix}{self.last_event_id:012d}"
+        self.store.save(key, **self.recommender.export_state(), meta={"last_event_id": self.last_event_id})
+        self.recommender.load_state(self.store.load(key))
+        for old in self._published_keys()[:-self.keep_published]:
+            self.store.delete(old)
+
+    def sync_published(self) -> bool:
+        """Muat bundle terbitan terbaru jika lebih baru dari event yang sudah dimasukkan; True jika dimuat."""
+        keys = self._published_keys()
+        if not keys or int(keys[-1][len(self.model_prefix):]) <= self.last_event_id:
+            return False
+        bundle = self.store.load(keys[-1])
+        self.recommender.load_state(bundle)
+        self.last_event_id = bundle["meta"]["last_event_id"]
+        return True
+
+    def run_once(self) -> int:
+        """Satu kali konsolidasi; mengembalikan jumlah baris interaksi yang dimasukkan ke CF."""
+        events = self.interaction_log.read_events(self.last_event_id, event_types=list(EVENT_RATINGS))
+        if events.empty:
+            return 0
+        interactions = events_to_interactions(events, self.recommender.df['ProdID'])
+        if len(interactions):
+            # Satu baris per (sesi, produk) lintas putaran: event yang diputar ulang / rating lebih rendah tidak menambah apa-apa
+            self.recommender.refresh_from_interactions(interactions, keep_highest=True)
+        self.last_event_id = int(events['id'].iloc[-1])
+        if len(interactions) and self.model_prefix is not None and self.store is not None:
+            self._publish()
+        logger.info(f"Konsolidasi interaction log: {len(events)} event → {len(interactions)} interaksi")
+        return len(interactions)
+
+    def _run(self):
+        # Putaran pertama langsung: event dari sesi sebelumnya ikut diputar ulang saat aplikasi start
+        while True:
+            try:
+                if not self.is_leader:
+                    self._lock_handle = _try_lock(self.lock_path)
+                    if self.is_leader:
+                        logger.info("Proses ini memegang kunci konsolidasi interaction log.")
+                # Pemegang kunci baru melanjutkan dari model terbitan terakhir, bukan memutar ulang log dari awal
+                self.sync_published()
+                if self.is_leader:
+                    self.run_once()
+            except Exception as e:
+                logger.warning(f"Konsolidasi interaction log gagal: {e}")
+            if self._stop.wait(self.interval):
+                break
+
+    def start(self):
+        """Jalankan thread latar: konsolidasi jika memegang kunci, selain itu muat model terbitan & coba kunci lagi."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="interaction-consolidator", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._lock_handle is not None:
+            self._lock_handle.close()
+            self._lock_handle = None
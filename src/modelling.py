@@ -2,49 +2,187 @@
 
 import pandas as pd
 import numpy as np
+from typing import NamedTuple
 from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
 import logging
 
 logger = logging.getLogger(__name__)
 
+class NeighborIndex(NamedTuple):
+    """Top-K tetangga hybrid per produk (padding: indeks -1, skor -inf)."""
+    indices: np.ndarray
+    scores: np.ndarray
+
+class NumericAngles(NamedTuple):
+    """Sudut & validitas vektor numerik 2-D [Rating_scaled, ReviewCount_scaled_log] per produk."""
+    angles: np.ndarray
+    valid: np.ndarray
+
+NUMERIC_FEATURE_COLUMNS = ['Rating_scaled', 'ReviewCount_scaled_log']
+# Bobot skor hybrid
+CONTENT_WEIGHT = 0.4
+NUMERIC_WEIGHT = 0.6
+
+def compute_numeric_angles(features) -> NumericAngles:
+    """Cosine dua vektor 2-D = cos(selisih sudut), jadi cukup simpan sudut per produk.
+
+    `features` boleh DataFrame (kolom NUMERIC_FEATURE_COLUMNS) atau array (N, 2) dari create_features(compact=True);
+    dtype array dipertahankan (float32 → kernel float32).
+    """
+    if isinstance(features, pd.DataFrame):
+        features = features[NUMERIC_FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+    num_features = np.asarray(features)
+    angles = np.arctan2(num_features[:, 1], num_features[:, 0])
+    # Vektor nol → similarity 0 (sama seperti cosine_similarity)
+    valid = np.hypot(num_features[:, 0], num_features[:, 1]) > 0
+    return NumericAngles(angles, valid)
+
+def numeric_similarity(numeric: NumericAngles, rows, candidates=None) -> np.ndarray:
+    """Numeric similarity closed-form untuk baris query vs kandidat (default: semua produk)."""
+    rows = np.atleast_1d(rows)
+    cand_angles = numeric.angles if candidates is None else numeric.angles[candidates]
+    cand_valid = numeric.valid if candidates is None else numeric.valid[candidates]
+    sim = np.cos(numeric.angles[rows][:, None] - cand_angles[None, :])
+    sim *= numeric.valid[rows][:, None] & cand_valid[None, :]
+    return sim
+
+def hybrid_similarity(tfidf_matrix, numeric: NumericAngles, rows, candidates=None) -> np.ndarray:
+    """Skor hybrid (40% Content, 60% Numeric) hanya untuk pasangan baris x kandidat yang dinilai."""
+    rows = np.atleast_1d(rows)
+    cand_matrix = tfidf_matrix if candidates is None else tfidf_matrix[candidates]
+    # cosine_similarity mempertahankan float32 jika matriks TF-IDF float32
+    content_sim = cosine_similarity(tfidf_matrix[rows], cand_matrix)
+    numeric_sim = numeric_similarity(numeric, rows, candidates).astype(content_sim.dtype, copy=False)
+    return CONTENT_WEIGHT * content_sim + NUMERIC_WEIGHT * numeric_sim
+
+def hybrid_pair_scores(tfidf_matrix, numeric: NumericAngles, rows, candidates: np.ndarray) -> np.ndarray:
+    """Skor hybrid eksak untuk kandidat yang berbeda per baris: candidates (B, m), padding -1 → -inf."""
+    rows = np.atleast_1d(rows)
+    valid_pair = candidates >= 0
+    cand = np.where(valid_pair, candidates, 0)
+    pair_rows = np.repeat(rows, cand.shape[1])
+    # Cosine per pasangan: dot baris-baris yang sudah dinormalisasi L2
+    content = np.asarray(
+        normalize(tfidf_matrix[pair_rows]).multiply(normalize(tfidf_matrix[cand.ravel()])).sum(axis=1)
+    ).reshape(cand.shape)
+    numeric_sim = np.cos(numeric.angles[rows][:, None] - numeric.angles[cand])
+    numeric_sim *= numeric.valid[rows][:, None] & numeric.valid[cand]
+    scores = (CONTENT_WEIGHT * content + NUMERIC_WEIGHT * numeric_sim).astype(np.float32)
+    scores[~valid_pair] = -np.inf
+    return scores
+
+def select_top_n(scores: np.ndarray, n: int):
+    """Top-n per baris (axis terakhir) via argpartition; hanya n kandidat yang diurutkan."""
+    n = min(n, scores.shape[-1])
+    if n <= 0:
+        empty = np.empty(scores.shape[:-1] + (0,), dtype=np.int64)
+        return empty, np.empty(empty.shape, dtype=scores.dtype)
+    top = np.argpartition(-scores, n - 1, axis=-1)[..., :n]
+    top_scores = np.take_along_axis(scores, top, axis=-1)
+    order = np.argsort(-top_scores, axis=-1, kind='stable')
+    return np.take_along_axis(top, order, axis=-1), np.take_along_axis(top_scores, order, axis=-1)
+
 def build_hybrid_model(df: pd.DataFrame, tfidf_matrix) -> np.ndarray:
-    """Membangun matriks Hybrid Similarity."""
+    """Membangun matriks Hybrid Similarity (dense N×N, hanya untuk katalog kecil/eksperimen)."""
     logger.info("Membangun Hybrid Model (Similarity Matrix)...")
     
-    # 1. Content-based similarity (dari TF-IDF)
-    content_sim = cosine_similarity(tfidf_matrix, tfidf_matrix)
-
-    # 2. Numeric similarity (dari Rating dan ReviewCount scaled log)
-    num_features = df[['Rating_scaled', 'ReviewCount_scaled_log']].values
-    numeric_sim = cosine_similarity(num_features, num_features)
-
-    # 3. Hybrid similarity (kombinasi 40% Content, 60% Numeric)
-    hybrid_sim = 0.4 * content_sim + 0.6 * numeric_sim
+    # Content 40% + Numeric 60% (numeric via sudut, tanpa cosine_similarity 2 kolom)
+    numeric = compute_numeric_angles(df)
+    hybrid_sim = hybrid_similarity(tfidf_matrix, numeric, np.arange(tfidf_matrix.shape[0]))
     
     logger.info(f"Hybrid Similarity matrix shape: {hybrid_sim.shape}")
     return hybrid_sim
 
-def calculate_evaluation_metrics(df: pd.DataFrame, hybrid_sim: np.ndarray) -> dict:
-    """Menghitung rata-rata similarity top-K untuk evaluasi model global."""
-    results = []
-    n_products = hybrid_sim.shape[0]
-    
-    # Pastikan ukuran df dan hybrid_sim sama
-    if len(df) != n_products:
-        df = df.iloc[:n_products].reset_index(drop=True)
-        
-    for idx in range(n_products):
-        # Ambil 5 produk paling mirip (diurutkan [1:6])
-        sim_scores = sorted(list(enumerate(hybrid_sim[idx])), key=lambda x: x[1], reverse=True)[1:6]
-        if sim_scores:
-            avg_sim = np.mean([s[1] for s in sim_scores])
-            results.append(avg_sim)
-        else:
-            results.append(0)
-    
-    df_similarity_eval = pd.DataFrame(results, columns=['Average_Similarity'])
-    
-    return {
-        "avg_topk_similarity": df_similarity_eval["Average_Similarity"].mean(),
-        "global_mean_similarity": df_similarity_eval["Average_Similarity"].mean()
-    }
\ No newline at end of file
+def compute_neighbors(tfidf_matrix, numeric: NumericAngles, rows: np.ndarray, k: int):
+    """Top-k tetangga hybrid untuk sekumpulan baris terhadap seluruh katalog → (indices, scores) (B, k)."""
+    rows = np.asarray(rows, dtype=np.int64)
+    # Hybrid similarity hanya untuk baris ini: (B, N)
+    block = hybrid_similarity(tfidf_matrix, numeric, rows)
+
+    # Produk itu sendiri tidak dihitung sebagai tetangga
+    block[np.arange(len(rows)), rows] = -np.inf
+
+    # Ambil top-K lalu urutkan hanya K kandidat tersebut
+    top, top_scores = select_top_n(block, k)
+    top[~np.isfinite(top_scores)] = -1
+    return top, top_scores
+
+def build_neighbor_index(df: pd.DataFrame, tfidf_matrix, top_k: int = 100, block_size: int = 256,
+                         numeric_features: np.ndarray = None, ann=None, ann_candidates: int = None) -> NeighborIndex:
+    """Membangun index top-K tetangga hybrid per blok baris (memori O(N·K), bukan O(N²)).
+
+    numeric_features: array (N, 2) dari create_features(compact=True); jika None diambil dari kolom df.
+    ann: HybridANNIndex (src/ann.py) opsional; jika diberikan (di-fit di sini bila belum), tiap baris hanya
+    dinilai eksak terhadap `ann_candidates` kandidat ANN (default 2·top_k) → build sub-kuadratik, hasil
+    perkiraan (recall diatur lewat knob ANN).
+    """
+    n_products = tfidf_matrix.shape[0]
+    k = max(min(top_k, n_products - 1), 0)
+    logger.info(f"Membangun Neighbor Index (top-{k}, blok {block_size})...")
+
+    indices = np.full((n_products, k), -1, dtype=np.int64)
+    scores = np.full((n_products, k), -np.inf, dtype=np.float32)
+    if k == 0:
+        return NeighborIndex(indices, scores)
+
+    numeric = compute_numeric_angles(df if numeric_features is None else numeric_features)
+    if ann is not None and not ann.is_fitted:
+        ann.fit(tfidf_matrix, numeric)
+
+    for start in range(0, n_products, block_size):
+        stop = min(start + block_size, n_products)
+        rows = np.arange(start, stop)
+        if ann is None:
+            indices[start:stop], scores[start:stop] = compute_neighbors(tfidf_matrix, numeric, rows, k)
+            continue
+        # Kandidat ANN → skor ulang eksak → top-k
+        cand, _ = ann.candidates(rows, max(ann_candidates or 2 * k, k))
+        cand_scores = hybrid_pair_scores(tfidf_matrix, numeric, rows, cand)
+        top, top_scores = select_top_n(cand_scores, k)
+        indices[start:stop] = np.where(np.isfinite(top_scores), np.take_along_axis(cand, top, axis=1), -1)
+        scores[start:stop] = top_scores
+
+    logger.info(f"Neighbor Index shape: {indices.shape}")
+    return NeighborIndex(indices, scores)
+
+def _mean_finite(top_scores: np.ndarray) -> np.ndarray:
+    """Rata-rata per baris hanya untuk skor valid (padding -inf diabaikan, baris kosong → 0)."""
+    top_scores = top_scores.astype(np.float64)
+    valid = np.isfinite(top_scores)
+    counts = valid.sum(axis=1)
+    sums = np.where(valid, top_scores, 0).sum(axis=1)
+    return np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+
+def calculate_evaluation_metrics(df: pd.DataFrame, hybrid_sim, top_k: int = 5, block_size: int = 1024,
+                                 return_distribution: bool = False) -> dict:
+    """Menghitung rata-rata similarity top-K untuk evaluasi model global.
+
+    `hybrid_sim` boleh berupa NeighborIndex atau matriks dense N×N (diproses per blok).
+    Produk itu sendiri dikeluarkan berdasarkan indeks (diagonal), bukan posisi [1:].
+    """
+    if isinstance(hybrid_sim, NeighborIndex):
+        # Index sudah terurut dan tanpa produk itu sendiri → top_k kolom pertama
+        results = _mean_finite(hybrid_sim.scores[:, :top_k])
+    else:
+        n_products = hybrid_sim.shape[0]
+        results = np.zeros(n_products, dtype=np.float64)
+        for start in range(0, n_products, block_size):
+            stop = min(start + block_size, n_products)
+            rows = np.arange(stop - start)
+            block = np.array(hybrid_sim[start:stop], dtype=np.float64)
+            block[rows, start + rows] = -np.inf
+            _, top_scores = select_top_n(block, top_k)
+            results[start:stop] = _mean_finite(top_scores)
+
+    metrics = {
+        "avg_topk_similarity": float(results.mean()) if len(results) else 0.0,
+        "global_mean_similarity": float(results.mean()) if len(results) else 0.0
+    }
+    if return_distribution:
+        # Distribusi skor per produk (untuk histogram/percentile di UI atau laporan)
+        metrics["per_item_similarity"] = results
+        metrics["similarity_percentiles"] = dict(zip(
+            ["p10", "p50", "p90"], np.percentile(results, [10, 50, 90]).tolist() if len(results) else [0.0] * 3
+        ))
+    return metrics
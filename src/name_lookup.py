@@ -0,0 +1,158 @@
+# src/name_lookup.py
+
+import re
+import numpy as np
+import pandas as pd
+from collections import defaultdict
+import logging
+from src.fuzzy_matcher import FuzzyMatcher, TrigramMatcher, padded_ngrams
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+def normalize_name(name: str) -> str:
+    """Normalisasi nama produk/query (strip + lowercase), sama untuk index dan query."""
+    return str(name).strip().lower()
+
+def char_ngrams(text: str, n: int = 3) -> set:
+    """Himpunan n-gram karakter dari teks yang sudah dinormalisasi."""
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+def _to_postings(buckets: dict) -> dict:
+    """Ubah bucket list posisi menjadi posting list NumPy yang terurut dan read-only."""
+    postings = {}
+    for key, rows in buckets.items():
+        arr = np.asarray(rows, dtype=np.int64)
+        arr.flags.writeable = False
+        postings[key] = arr
+    return postings
+
+def _pack_postings(postings: dict):
+    """Posting list dict → (keys, offsets, posisi gabungan): satu array besar, cepat di-pickle/joblib."""
+    keys = list(postings)
+    lengths = np.fromiter((len(postings[key]) for key in keys), dtype=np.int64, count=len(keys))
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    flat = np.concatenate([postings[key] for key in keys]) if keys else np.empty(0, dtype=np.int64)
+    return keys, offsets, flat
+
+def _unpack_postings(packed) -> dict:
+    """Kebalikan _pack_postings: posting list menjadi view (read-only) ke array gabungan, tanpa salinan."""
+    keys, offsets, flat = packed
+    flat.flags.writeable = False
+    return {key: flat[offsets[i]:offsets[i + 1]] for i, key in enumerate(keys)}
+
+class NameLookupIndex:
+    """Index nama produk yang dibangun sekali: exact (hash map), token (inverted index), dan n-gram karakter.
+
+    fuzzy_matcher: FuzzyMatcher pengganti TrigramMatcher; harus dibangun atas nama yang sudah melalui
+    normalize_name (urutan sama dengan `names`), karena query fuzzy juga dinormalisasi dulu.
+    """
+
+    def __init__(self, names: pd.Series, ngram: int = 3, fuzzy_matcher: FuzzyMatcher = None):
+        self.ngram = ngram
+        self.names = np.array([normalize_name(x) for x in names.fillna('')], dtype=object)
+        self.names.flags.writeable = False
+
+        exact = {}
+        tokens = defaultdict(list)
+        grams = defaultdict(list)
+        # Posisi ditambahkan berurutan → setiap posting list otomatis terurut
+        for pos, name in enumerate(self.names):
+            exact.setdefault(name, pos)
+            for token in set(TOKEN_PATTERN.findall(name)):
+                tokens[token].append(pos)
+            # N-gram dengan padding memuat semua n-gram internal → tetap valid untuk cek substring
+            for gram in padded_ngrams(name, ngram):
+                grams[gram].append(pos)
+
+        self.exact = exact
+        self.token_postings = _to_postings(tokens)
+        self.ngram_postings = _to_postings(grams)
+        # Default: matcher trigram yang memakai ulang posting list di atas
+        self.fuzzy_matcher = fuzzy_matcher or TrigramMatcher(self.names, ngram, postings=self.ngram_postings)
+        logger.info(f"Name index: {len(exact)} nama, {len(self.token_postings)} token, {len(self.ngram_postings)} n-gram")
+
+    def __getstate__(self):
+        # Disimpan ringkas untuk artifact bundle: posting list dipadatkan, exact map dibangun ulang dari
+        # names, dan TrigramMatcher default (berbagi ngram_postings) cukup disimpan parameternya
+        state = self.__dict__.copy()
+        state['exact'] = None
+        state['token_postings'] = _pack_postings(self.token_postings)
+        state['ngram_postings'] = _pack_postings(self.ngram_postings)
+        matcher = self.fuzzy_matcher
+        if isinstance(matcher, TrigramMatcher) and matcher.postings is self.ngram_postings:
+            state['fuzzy_matcher'] = ('trigram', matcher.cutoff)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # Posisi pertama per nama menang (sama dengan setdefault saat build)
+        n = len(self.names)
+        self.exact = dict(zip(self.names[::-1].tolist(), range(n - 1, -1, -1)))
+        self.token_postings = _unpack_postings(state['token_postings'])
+        self.ngram_postings = _unpack_postings(state['ngram_postings'])
+        if isinstance(state['fuzzy_matcher'], tuple):
+            _, cutoff = state['fuzzy_matcher']
+            self.fuzzy_matcher = TrigramMatcher(self.names, self.ngram, cutoff=cutoff, postings=self.ngram_postings)
+
+    def _intersect(self, postings: dict, keys) -> np.ndarray:
+        """Irisan posting list (mulai dari yang terpendek); kosong jika ada key yang tidak dikenal."""
+        lists = [postings.get(key) for key in keys]
+        if not lists or any(p is None for p in lists):
+            return np.empty(0, dtype=np.int64)
+        lists.sort(key=len)
+        result = lists[0]
+        for p in lists[1:]:
+            result = result[np.isin(result, p, assume_unique=True)]
+            if len(result) == 0:
+                break
+        return result
+
+    def find_exact(self, query: str):
+        return self.exact.get(query)
+
+    def find_partial(self, query: str):
+        """Produk pertama yang namanya mengandung query (substring), lalu yang memuat semua token query."""
+        if len(query) >= self.ngram:
+            # Setiap nama yang memuat query pasti memuat semua n-gram-nya. Cek dulu awal posting
+            # list terpendek (query umum langsung ketemu), baru iris semua posting list.
+            grams = char_ngrams(query, self.ngram)
+            shortest = min((self.ngram_postings.get(g, ()) for g in grams), key=len)
+            for pos in shortest[:64]:
+                if query in self.names[pos]:
+                    return int(pos)
+            candidates = self._intersect(self.ngram_postings, grams)
+        else:
+            candidates = np.arange(len(self.names))
+        for pos in candidates:
+            if query in self.names[pos]:
+                return int(pos)
+
+        # Semua token query muncul sebagai kata di nama (urutan bebas)
+        candidates = self._intersect(self.token_postings, set(TOKEN_PATTERN.findall(query)))
+        if len(candidates) > 0:
+            return int(candidates[0])
+        return None
+
+    def find_fuzzy(self, query: str):
+        matches = self.fuzzy_matcher.match(query, k=1)
+        return matches[0][0] if matches else None
+
+    def suggest(self, query: str, k: int = 5) -> list:
+        """Kandidat "did you mean" → list (posisi, skor)."""
+        return self.fuzzy_matcher.match(normalize_name(query), k=k)
+
+    def lookup(self, query: str):
+        """Resolusi query ke posisi produk acuan → (posisi, jenis match) atau None."""
+        query = normalize_name(query)
+        pos = self.find_exact(query)
+        if pos is not None:
+            return pos, "exact"
+        pos = self.find_partial(query)
+        if pos is not None:
+            return pos, "partial"
+        pos = self.find_fuzzy(query)
+        if pos is not None:
+            return pos, "fuzzy"
+        return None
@@ -6,6 +6,34 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+def fill_missing(series: pd.Series, value) -> pd.Series:
+    """fillna yang juga aman untuk kolom category (nilai pengisi ditambahkan ke kategori dulu)."""
+    if isinstance(series.dtype, pd.CategoricalDtype) and value not in series.cat.categories:
+        series = series.cat.add_categories([value])
+    return series.fillna(value)
+
+def fill_with_group_mean(values: pd.Series, groups: pd.Series, fallback: float = None) -> pd.Series:
+    """Isi NaN di `values` dengan rata-rata grupnya (mis. per Brand / per ProdID), sekali jalan O(n).
+
+    Grup di-factorize menjadi kode integer, lalu jumlah & banyaknya nilai per grup dihitung dengan
+    np.bincount dan dipetakan balik lewat kode → tanpa lambda Python per grup. Baris yang grupnya tidak
+    punya nilai sama sekali (atau grupnya NaN) diisi `fallback` jika diberikan, selain itu tetap NaN.
+    """
+    arr = values.to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+    codes, uniques = pd.factorize(groups, sort=False)
+    known = ~np.isnan(arr)
+    in_group = codes >= 0
+    sums = np.bincount(codes[known & in_group], weights=arr[known & in_group], minlength=len(uniques))
+    counts = np.bincount(codes[known & in_group], minlength=len(uniques))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = sums / counts
+
+    missing = ~known & in_group
+    arr[missing] = means[codes[missing]]
+    if fallback is not None:
+        arr[np.isnan(arr)] = fallback
+    return pd.Series(arr, index=values.index, name=values.name).astype(values.dtype)
+
 def clean_and_handle_missing_values(df: pd.DataFrame) -> pd.DataFrame:
     """Melakukan pembersihan dan penanganan missing value."""
     df = df.copy()
@@ -17,8 +45,8 @@ def clean_and_handle_missing_values(df: pd.DataFrame) -> pd.DataFrame:
     df['Description'] = df['Description'].fillna('')
     df['Tags'] = df['Tags'].fillna('')
     df['Name'] = df['Name'].fillna('')
-    df['Category'] = df['Category'].fillna('Unknown')
-    df['Brand'] = df['Brand'].fillna('Unknown')
+    df['Category'] = fill_missing(df['Category'], 'Unknown')
+    df['Brand'] = fill_missing(df['Brand'], 'Unknown')
 
     # 2. Hapus duplikat berdasarkan ProdID
     if 'ProdID' in df.columns:
@@ -30,7 +58,7 @@ def clean_and_handle_missing_values(df: pd.DataFrame) -> pd.DataFrame:
     # 3. Pembersihan Rating Lanjutan
     df['Rating'] = df['Rating'].replace(0, np.nan)
     # Isi NaN dengan rata-rata rating per Brand
-    df['Rating'] = df.groupby('Brand')['Rating'].transform(lambda x: x.fillna(x.mean()))
+    df['Rating'] = fill_with_group_mean(df['Rating'], df['Brand'])
     # Isi NaN yang tersisa dengan rata-rata global
     df['Rating'] = df['Rating'].fillna(df['Rating'].mean())
 
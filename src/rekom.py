@@ -1,31 +1,76 @@
 import pandas as pd
 import numpy as np
 import os
-from sklearn.metrics.pairwise import cosine_similarity
+import threading
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
 import logging
+from src.data_loader import load_local_data
+from src.preprocessing import fill_missing, fill_with_group_mean
+from src.artifact_store import sparse_to_arrays, arrays_to_sparse
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+RECOMMENDATION_COLUMNS = ['ProdID', 'Name', 'Brand', 'Category', 'Rating', 'ReviewCount', 'ImageURL', 'Description', 'Price']
+MOST_LIKED_COLUMNS = ['ProdID', 'Name', 'Brand', 'Category', 'average_rating', 'ReviewCount', 'ImageURL', 'Description', 'Price']
+POPULARITY_KEYS = ('average_rating', 'interaction_count', 'bayesian_score')
+
+def prune_top_k(matrix: sp.csr_matrix, k: int) -> sp.csr_matrix:
+    """Sisakan k nilai terbesar per baris CSR; di tiap baris entri terurut menurun menurut skor."""
+    counts = np.diff(matrix.indptr)
+    rows = np.repeat(np.arange(matrix.shape[0]), counts)
+    order = np.lexsort((-matrix.data, rows))
+    rank = np.arange(matrix.nnz) - matrix.indptr[rows]
+    keep = order[rank < k]
+    indptr = np.concatenate([[0], np.cumsum(np.minimum(counts, k))])
+    return sp.csr_matrix((matrix.data[keep], matrix.indices[keep], indptr), shape=matrix.shape)
+
 class CollaborativeFilteringRecommender:
-    def __init__(self, data_path, num_users=500, random_seed=42):
+    def __init__(self, data_path, num_users=500, random_seed=42, df=None, interactions_df=None, item_similarity=None,
+                 raw_df=None, top_k=100):
+        """df / interactions_df / item_similarity opsional: jika diberikan (mis. dari artifact store), tahap
+        load/simulasi/similarity dilewati. item_similarity (CSR top-K) boleh dirakit dari array np.memmap
+        read-only yang dibagi antar proses.
+        raw_df: data mentah hasil load_local_data yang sudah dimuat pemanggil, agar file tidak dibaca dua kali.
+        top_k: jumlah tetangga yang disimpan per item di item_similarity."""
         self.data_path = data_path
         self.num_users = num_users
         self.random_seed = random_seed
-        self.df = None
+        self.top_k = top_k
+        self.df = df
         self.user_item_matrix = None
-        self.item_similarity_df = None
-        self.user_ids = None
-        self.interactions_df = None
-        self._load_and_preprocess_data()
-        self._simulate_interactions()
-        self._build_similarity_matrix()
+        self.item_similarity = None
+        self.item_ids = None
+        self.user_index = None
+        self._item_lookup = None
+        self._catalogue_pos = None
+        self._popularity = None
+        # Interaksi dari record_interactions yang belum digabung ke interactions_df (digabung saat refresh)
+        self._pending_interactions = []
+        # Query membaca model di bawah lock; refresh_from_interactions memasang model baru di bawah lock yang sama
+        self._lock = threading.RLock()
+        self.user_ids = [f"user_{i}" for i in range(num_users)]
+        self.interactions_df = interactions_df
+        if self.df is None:
+            self._load_and_preprocess_data(raw_df)
+        if self.interactions_df is None:
+            self._simulate_interactions()
+        # Matriks user-item sparse selalu dibangun (O(interaksi)); similarity hanya jika belum ada
+        self._build_user_item_matrix()
+        if item_similarity is None:
+            self._build_similarity_matrix()
+        else:
+            self.item_similarity = item_similarity
+        self._build_popularity_index()
         logger.info("CF initialized.")
 
-    def _load_and_preprocess_data(self):
-        if not os.path.exists(self.data_path):
-            raise FileNotFoundError(f"Dataset file not found: {self.data_path}")
-        self.df = pd.read_csv(self.data_path)
+    def _load_and_preprocess_data(self, raw_df=None):
+        if raw_df is None:
+            if not os.path.exists(self.data_path):
+                raise FileNotFoundError(f"Dataset file not found: {self.data_path}")
+            raw_df = load_local_data(self.data_path)
+        self.df = raw_df.copy()
         required_cols = ['Rating','ReviewCount','Description','Tags','Name','Category','Brand','ProdID','ImageURL']
         for c in required_cols:
             if c not in self.df.columns:
@@ -34,14 +79,12 @@ class CollaborativeFilteringRecommender:
         self.df['ReviewCount'] = pd.to_numeric(self.df['ReviewCount'], errors='coerce').fillna(0)
         # Rating 0 → NaN → diisi mean per item → minimal 1
         self.df.loc[self.df['Rating'] == 0, 'Rating'] = np.nan
-        self.df['Rating'] = self.df.groupby('ProdID')['Rating'].transform(
-            lambda x: x.fillna(x.mean() if not np.isnan(x.mean()) else 1)
-        )
+        self.df['Rating'] = fill_with_group_mean(self.df['Rating'], self.df['ProdID'], fallback=1)
         # Pastikan tidak ada rating 0
         self.df['Rating'] = self.df['Rating'].clip(lower=1)
         self.df['Description'] = self.df['Description'].fillna('')
         self.df['Name'] = self.df['Name'].fillna('')
-        self.df['Category'] = self.df['Category'].fillna('Unknown')
+        self.df['Category'] = fill_missing(self.df['Category'], 'Unknown')
         if 'ProdID' not in self.df.columns:
             self.df['ProdID'] = ['prod_' + str(i) for i in range(len(self.df))]
         self.df = self.df.drop_duplicates(subset=['ProdID']).reset_index(drop=True)
@@ -51,39 +94,352 @@ class CollaborativeFilteringRecommender:
         logger.info(f"Dataset loaded: {self.df.shape}")
 
     def _simulate_interactions(self):
-        np.random.seed(self.random_seed)
+        """Simulasi interaksi user-produk sepenuhnya vektor (deterministik terhadap random_seed).
+
+        Per produk 1-19 interaksi, user acak, rating ~ N(rating produk, 0.4) di-clip ke [1, 5]
+        dan dibulatkan 1 desimal. Semua angka acak diambil dalam satu panggilan per kolom.
+        """
+        rng = np.random.default_rng(self.random_seed)
         self.user_ids = [f"user_{i}" for i in range(self.num_users)]
-        interactions = []
-        for _, row in self.df.iterrows():
-            prod_id = row['ProdID']
-            base_rating = float(row['Rating'])
-            num_interact = np.random.randint(1, 20)
-            for _ in range(num_interact):
-                user = np.random.choice(self.user_ids)
-                rating = np.clip(np.random.normal(base_rating, 0.4), 1, 5)
-                interactions.append({'user_id': user, 'prod_id': prod_id, 'rating': round(float(rating),1)})
-        self.interactions_df = pd.DataFrame(interactions)
+        counts = rng.integers(1, 20, size=len(self.df))
+        rows = np.repeat(np.arange(len(self.df)), counts)
+        users = rng.integers(0, self.num_users, size=len(rows))
+        base_rating = self.df['Rating'].to_numpy(dtype=np.float64)[rows]
+        ratings = np.clip(rng.normal(base_rating, 0.4), 1, 5).round(1)
+        self.interactions_df = pd.DataFrame({
+            'user_id': pd.Categorical.from_codes(users, categories=self.user_ids),
+            'prod_id': self.df['ProdID'].to_numpy()[rows],
+            'rating': ratings.astype(np.float32),
+        })
         logger.info(f"Simulated interactions: {len(self.interactions_df)} rows")
 
+    def _user_item_state(self, interactions: pd.DataFrame) -> dict:
+        """Matriks user × item CSR langsung dari id yang di-encode integer (tanpa pivot dense).
+
+        item_ids = prod_id unik terurut, user_index = user_id unik; interaksi ganda (user, item) dirata-rata.
+        Dikembalikan sebagai dict atribut agar bisa dipasang sekaligus.
+        """
+        users = interactions['user_id']
+        if isinstance(users.dtype, pd.CategoricalDtype):
+            user_codes, user_index = users.cat.codes.to_numpy(), users.cat.categories
+        else:
+            user_codes, user_index = pd.factorize(users, sort=True)
+        item_codes, item_ids = pd.factorize(interactions['prod_id'], sort=True)
+        item_ids = np.asarray(item_ids)
+        shape = (len(user_index), len(item_ids))
+        ratings = interactions['rating'].to_numpy(dtype=np.float32)
+        # user_id / prod_id kosong → kode -1; baris ini dibuang (seperti pivot_table sebelumnya)
+        valid = (user_codes >= 0) & (item_codes >= 0)
+        if not valid.all():
+            user_codes, item_codes, ratings = user_codes[valid], item_codes[valid], ratings[valid]
+
+        totals = sp.csr_matrix((ratings, (user_codes, item_codes)), shape=shape)
+        counts = sp.csr_matrix((np.ones_like(ratings), (user_codes, item_codes)), shape=shape)
+        totals.data /= counts.data   # pola sparsity sama → rata-rata per (user, item)
+        logger.info(f"User-item matrix: {shape}, {totals.nnz} interaksi unik")
+        return {
+            'user_index': user_index,
+            'item_ids': item_ids,
+            # prod_id → kode item, dan kode item → baris katalog (untuk menampilkan detail produk)
+            '_item_lookup': pd.Index(item_ids),
+            '_catalogue_pos': pd.Index(self.df['ProdID']).get_indexer(item_ids),
+            'user_item_matrix': totals,
+        }
+
+    def _build_user_item_matrix(self):
+        for name, value in self._user_item_state(self.interactions_df).items():
+            setattr(self, name, value)
+
+    def _compute_similarity(self, user_item_matrix: sp.csr_matrix, block_size=2048) -> sp.csr_matrix:
+        """Cosine item-item secara sparse per blok item, lalu dipangkas ke top_k tetangga per item (tanpa diri sendiri).
+
+        Memori sebanding jumlah pasangan item yang berbagi user dalam satu blok, bukan users × items.
+        """
+        items = normalize(user_item_matrix.T.tocsr().astype(np.float64))
+        items_t = items.T.tocsr()
+        blocks = []
+        for start in range(0, items.shape[0], block_size):
+            sims = (items[start:start + block_size] @ items_t).tocsr()
+            rows = np.repeat(np.arange(sims.shape[0]), np.diff(sims.indptr))
+            sims.data[sims.indices == rows + start] = 0
+            sims.eliminate_zeros()
+            blocks.append(prune_top_k(sims.astype(np.float32), self.top_k))
+        similarity = sp.vstack(blocks, format='csr')
+        logger.info(f"Similarity matrix built: top-{self.top_k}, {similarity.nnz} pasangan")
+        return similarity
+
     def _build_similarity_matrix(self):
-        self.user_item_matrix = self.interactions_df.pivot_table(
-            index='user_id', columns='prod_id', values='rating', fill_value=0
-        )
-        item_sim = cosine_similarity(self.user_item_matrix.T)
-        self.item_similarity_df = pd.DataFrame(
-            item_sim, index=self.user_item_matrix.columns, columns=self.user_item_matrix.columns
-        )
-        logger.info("Similarity matrix built.")
-
-    def get_most_liked_products(self, top_n=10):
-        if self.interactions_df is None or self.interactions_df.empty:
-            logger.warning("No interactions data available to determine most liked products.")
-            return pd.DataFrame()
-        # Hitung rata-rata rating untuk setiap produk
-        product_avg_ratings = self.interactions_df.groupby('prod_id')['rating'].mean().reset_index()
-        product_avg_ratings = product_avg_ratings.rename(columns={'rating': 'average_rating', 'prod_id': 'ProdID'})
-        # Gabungkan dengan dataframe produk asli untuk mendapatkan detail lainnya
-        most_liked = pd.merge(product_avg_ratings, self.df, on='ProdID', how='left')
-        # Urutkan berdasarkan rata-rata rating tertinggi dan ambil top_n
-        most_liked = most_liked.sort_values(by='average_rating', ascending=False)
-        return most_liked.head(top_n)[['ProdID', 'Name', 'Brand', 'Category', 'average_rating', 'ReviewCount', 'ImageURL', 'Description', 'Price']]
+        self.item_similarity = self._compute_similarity(self.user_item_matrix)
+
+    @property
+    def item_similarity_df(self):
+        """Tampilan berlabel prod_id dari item_similarity (DataFrame sparse, dibuat saat diminta)."""
+        frame = pd.DataFrame.sparse.from_spmatrix(self.item_similarity, index=self.item_ids, columns=self.item_ids)
+        return frame.astype(pd.SparseDtype(self.item_similarity.dtype, 0))
+
+    def _item_frame(self, codes, scores, score_col):
+        """Detail katalog untuk kode item (urutan dipertahankan) + kolom skor."""
+        pos = self._catalogue_pos[codes]
+        known = pos >= 0
+        frame = self.df.iloc[pos[known]][RECOMMENDATION_COLUMNS].copy()
+        frame[score_col] = np.asarray(scores)[known]
+        return frame
+
+    def _top_unseen(self, profiles: sp.csr_matrix, n: int) -> sp.csr_matrix:
+        """Skor item-based (Σ rating item yang sudah dilihat × similarity) per baris profil, item yang
+        sudah dilihat di-mask, lalu top-n per baris. Hanya tetangga top-K item yang dilihat yang disentuh."""
+        scores = (profiles @ self.item_similarity).tocsr()
+        scores = scores - scores.multiply(profiles != 0)
+        scores.eliminate_zeros()
+        return prune_top_k(scores.tocsr(), n)
+
+    def similar_items(self, prod_id, n=10):
+        """Item paling mirip dengan prod_id menurut neighbour list top-K (kolom 'similarity')."""
+        with self._lock:
+            code = self._item_lookup.get_indexer([prod_id])[0]
+            if code < 0:
+                logger.warning(f"Produk {prod_id} tidak punya data interaksi.")
+                return pd.DataFrame()
+            lo, hi = self.item_similarity.indptr[code], self.item_similarity.indptr[code + 1]
+            neighbours, scores = self.item_similarity.indices[lo:hi], self.item_similarity.data[lo:hi]
+            top = np.argsort(-scores, kind='stable')[:n]
+            return self._item_frame(neighbours[top], scores[top], 'similarity')
+
+    def recommend_for_items(self, prod_ids, n=10):
+        """Rekomendasi untuk sesi anonim (mis. isi keranjang): item yang dilihat berbobot 1."""
+        with self._lock:
+            codes = self._item_lookup.get_indexer(list(prod_ids))
+            codes = np.unique(codes[codes >= 0])
+            if len(codes) == 0:
+                return pd.DataFrame()
+            profile = sp.csr_matrix((np.ones(len(codes), dtype=np.float32), codes, [0, len(codes)]),
+                                    shape=(1, len(self.item_ids)))
+            top = self._top_unseen(profile, n)
+            return self._item_frame(top.indices, top.data, 'final_score')
+
+    def recommend_for_user(self, user_id, n=10):
+        """Rekomendasi personal untuk satu user (detail katalog + 'final_score'), tanpa item yang sudah dirating."""
+        with self._lock:
+            result = self.recommend_for_users([user_id], n)
+            if result.empty:
+                return pd.DataFrame()
+            return self._item_frame(result['item_code'].to_numpy(), result['final_score'].to_numpy(), 'final_score')
+
+    def recommend_for_users(self, user_ids, n=10):
+        """Versi batch: satu perkalian sparse untuk semua user.
+
+        Mengembalikan DataFrame panjang [user_id, rank, ProdID, item_code, final_score]; user tanpa
+        interaksi dilewati.
+        """
+        with self._lock:
+            rows = self.user_index.get_indexer(list(user_ids))
+            known = rows >= 0
+            if not known.any():
+                return pd.DataFrame(columns=['user_id', 'rank', 'ProdID', 'item_code', 'final_score'])
+            top = self._top_unseen(self.user_item_matrix[rows[known]], n)
+            counts = np.diff(top.indptr)
+            return pd.DataFrame({
+                'user_id': np.repeat(np.asarray(list(user_ids), dtype=object)[known], counts),
+                'rank': np.arange(top.nnz) - np.repeat(top.indptr[:-1], counts) + 1,
+                'ProdID': self.item_ids[top.indices],
+                'item_code': top.indices,
+                'final_score': top.data,
+            })
+
+    def _build_popularity_index(self):
+        """Agregat popularitas per produk (jumlah & total rating interaksi), dihitung sekali dari interactions_df."""
+        codes, prod_ids = pd.factorize(self.interactions_df['prod_id'])
+        ratings = self.interactions_df['rating'].to_numpy(dtype=np.float64)
+        # prod_id kosong → kode -1, tidak ikut dihitung
+        known = codes >= 0
+        codes, ratings = codes[known], ratings[known]
+        self._popularity = {
+            'ids': pd.Index(prod_ids),
+            'catalogue_pos': pd.Index(self.df['ProdID']).get_indexer(prod_ids),
+            'count': np.bincount(codes, minlength=len(prod_ids)).astype(np.int64),
+            'sum': np.bincount(codes, weights=ratings, minlength=len(prod_ids)),
+            'rankings': {},   # cache urutan per key; dikosongkan setiap ada interaksi baru
+        }
+
+    def record_interactions(self, interactions: pd.DataFrame):
+        """Tambah interaksi baru (kolom user_id, prod_id, rating) dan perbarui agregat popularitas secara inkremental.
+
+        Biaya O(interaksi baru): baris baru hanya ditampung dan baru digabung ke interactions_df di
+        refresh_from_interactions; urutan ranking dihitung ulang malas pada query popularitas berikutnya.
+        Matriks user-item & similarity tidak ikut berubah (lihat refresh_from_interactions).
+        """
+        if interactions is None or len(interactions) == 0:
+            return
+        with self._lock:
+            self._append_interactions(interactions)
+
+    def refresh_from_interactions(self, interactions: pd.DataFrame, keep_highest: bool = False):
+        """Tambah interaksi baru lalu bangun ulang matriks user-item & similarity top-K.
+
+        Perhitungan berat berjalan di luar lock (query lain tetap dilayani model lama); model baru
+        dipasang sekaligus di dalam lock sehingga query tidak pernah melihat state setengah jadi.
+        keep_highest=True: satu baris per (user_id, prod_id) dengan rating tertinggi (aturan event log) —
+        pasangan yang sudah ada hanya diganti jika rating baru lebih tinggi, jadi konsolidasi berulang
+        tidak menggandakan hitungan popularitas maupun merata-rata rating.
+        """
+        with self._lock:
+            if interactions is not None and len(interactions):
+                if keep_highest:
+                    self._merge_pending()
+                    interactions = self._supersede_interactions(interactions)
+                self._append_interactions(interactions)
+            self._merge_pending()
+            snapshot = self.interactions_df
+        state = self._user_item_state(snapshot)
+        state['item_similarity'] = self._compute_similarity(state['user_item_matrix'])
+        with self._lock:
+            for name, value in state.items():
+                setattr(self, name, value)
+        logger.info(f"Model CF diperbarui: {len(snapshot)} interaksi")
+
+    def export_state(self) -> dict:
+        """Model CF saat ini sebagai isi artifact bundle: interaksi & agregat popularitas (frames) dan
+        similarity top-K sebagai array CSR (untuk dimuat proses lain lewat load_state)."""
+        with self._lock:
+            self._merge_pending()
+            pop = self._popularity
+            return {
+                "frames": {
+                    "cf_interactions": self.interactions_df,
+                    "cf_popularity": pd.DataFrame({'prod_id': pop['ids'], 'count': pop['count'], 'sum': pop['sum']}),
+                },
+                "arrays": sparse_to_arrays("cf_item_similarity", self.item_similarity),
+            }
+
+    def load_state(self, bundle: dict):
+        """Pasang model dari bundle hasil export_state; array similarity boleh np.memmap read-only (dibagi antar proses).
+
+        Matriks user-item dibangun di luar lock, lalu semua state dipasang sekaligus seperti refresh_from_interactions.
+        Interaksi dari record_interactions yang belum di-refresh di proses ini digantikan isi bundle.
+        """
+        interactions = bundle["frames"]["cf_interactions"]
+        popularity = bundle["frames"]["cf_popularity"]
+        state = self._user_item_state(interactions)
+        state['item_similarity'] = arrays_to_sparse("cf_item_similarity", bundle["arrays"])
+        ids = pd.Index(popularity['prod_id'])
+        state['_popularity'] = {
+            'ids': ids,
+            'catalogue_pos': pd.Index(self.df['ProdID']).get_indexer(ids),
+            'count': popularity['count'].to_numpy(dtype=np.int64),
+            'sum': popularity['sum'].to_numpy(dtype=np.float64),
+            'rankings': {},
+        }
+        state['interactions_df'] = interactions
+        with self._lock:
+            for name, value in state.items():
+                setattr(self, name, value)
+            self._pending_interactions = []
+        logger.info(f"Model CF dimuat dari bundle: {len(interactions)} interaksi")
+
+    def _merge_pending(self):
+        if self._pending_interactions:
+            self.interactions_df = pd.concat([self.interactions_df, *self._pending_interactions], ignore_index=True)
+            self._pending_interactions = []
+
+    def _supersede_interactions(self, interactions: pd.DataFrame) -> pd.DataFrame:
+        """Interaksi baru yang rating-nya lebih tinggi dari baris (user_id, prod_id) yang sudah ada (atau pasangan baru).
+
+        Baris lama yang kalah dibuang dari interactions_df dan ditarik dari agregat popularitas.
+        """
+        key_cols = ['user_id', 'prod_id']
+        interactions = interactions.groupby(key_cols, as_index=False, sort=False)['rating'].max()
+        current = self.interactions_df
+        # Hanya baris milik user yang muncul di batch yang dibandingkan (sesi log ≠ user simulasi)
+        rows = np.flatnonzero(current['user_id'].isin(interactions['user_id'].unique()).to_numpy())
+        if len(rows) == 0:
+            return interactions
+        old = pd.DataFrame({
+            'user_id': current['user_id'].to_numpy(dtype=object)[rows],
+            'prod_id': current['prod_id'].to_numpy()[rows],
+            'rating_old': current['rating'].to_numpy()[rows],
+            'row': rows,
+        })
+        matched = old.merge(interactions, on=key_cols)
+        if matched.empty:
+            return interactions
+        best_old = matched.groupby(key_cols, sort=False)['rating_old'].transform('max')
+        retract = matched.loc[matched['rating'] > best_old, 'row'].to_numpy()
+
+        # Pasangan yang sudah punya rating setara/lebih tinggi tidak ditambahkan lagi
+        existing = matched.groupby(key_cols, sort=False)['rating_old'].max()
+        existing = existing.reindex(pd.MultiIndex.from_frame(interactions[key_cols])).to_numpy()
+        interactions = interactions[~(existing >= interactions['rating'].to_numpy())]
+
+        if len(retract):
+            pop = self._popularity
+            codes = pop['ids'].get_indexer(current['prod_id'].to_numpy()[retract])
+            np.subtract.at(pop['count'], codes, 1)
+            np.subtract.at(pop['sum'], codes, current['rating'].to_numpy(dtype=np.float64)[retract])
+            pop['rankings'].clear()
+            keep = np.ones(len(current), dtype=bool)
+            keep[retract] = False
+            self.interactions_df = current[keep].reset_index(drop=True)
+        return interactions
+
+    def _append_interactions(self, interactions: pd.DataFrame):
+        pop = self._popularity
+        self._pending_interactions.append(interactions)
+        # prod_id kosong tidak punya slot agregat (np.add.at dengan -1 akan menambah slot terakhir)
+        interactions = interactions[interactions['prod_id'].notna()]
+
+        codes = pop['ids'].get_indexer(interactions['prod_id'])
+        if (codes < 0).any():
+            # Produk yang baru pertama kali berinteraksi (jarang) → agregat diperpanjang
+            new_ids = pd.Index(pd.unique(interactions['prod_id'].to_numpy()[codes < 0]))
+            pop['ids'] = pop['ids'].append(new_ids)
+            pop['catalogue_pos'] = np.concatenate([pop['catalogue_pos'], pd.Index(self.df['ProdID']).get_indexer(new_ids)])
+            pop['count'] = np.concatenate([pop['count'], np.zeros(len(new_ids), dtype=np.int64)])
+            pop['sum'] = np.concatenate([pop['sum'], np.zeros(len(new_ids))])
+            codes = pop['ids'].get_indexer(interactions['prod_id'])
+
+        # np.add.at hanya menyentuh produk yang muncul (bincount dengan minlength = O(produk))
+        np.add.at(pop['count'], codes, 1)
+        np.add.at(pop['sum'], codes, interactions['rating'].to_numpy(dtype=np.float64))
+        pop['rankings'].clear()
+
+    def popularity_scores(self, by='average_rating'):
+        """Skor popularitas per produk (urutan = self._popularity['ids']).
+
+        bayesian_score = (C·m + Σrating) / (C + n), dengan m rata-rata rating global dan C rata-rata
+        jumlah interaksi per produk → produk dengan sedikit interaksi ditarik ke rata-rata global.
+        """
+        pop = self._popularity
+        if by not in POPULARITY_KEYS:
+            raise ValueError(f"by harus salah satu dari {POPULARITY_KEYS}")
+        if by == 'interaction_count':
+            return pop['count']
+        if by == 'average_rating':
+            return pop['sum'] / np.maximum(pop['count'], 1)
+        prior_weight = pop['count'].mean()
+        global_mean = pop['sum'].sum() / max(pop['count'].sum(), 1)
+        return (prior_weight * global_mean + pop['sum']) / (prior_weight + pop['count'])
+
+    def _popularity_ranking(self, by):
+        """Posisi produk (yang ada di katalog & pernah berinteraksi) terurut menurun; di-cache per key."""
+        pop = self._popularity
+        if by not in pop['rankings']:
+            scores = self.popularity_scores(by)
+            eligible = np.flatnonzero((pop['catalogue_pos'] >= 0) & (pop['count'] > 0))
+            pop['rankings'][by] = eligible[np.argsort(-scores[eligible], kind='stable')]
+        return pop['rankings'][by]
+
+    def get_most_liked_products(self, top_n=10, by='average_rating'):
+        """Top-N produk terpopuler dari index popularitas (slice urutan yang sudah di-cache, tanpa groupby/merge/sort).
+
+        by: 'average_rating' (default, perilaku lama), 'interaction_count', atau 'bayesian_score'.
+        """
+        with self._lock:
+            if self._popularity is None or len(self._popularity['ids']) == 0:
+                logger.warning("No interactions data available to determine most liked products.")
+                return pd.DataFrame()
+            top = self._popularity_ranking(by)[:top_n]
+            most_liked = self.df.iloc[self._popularity['catalogue_pos'][top]].copy()
+            # Skor hanya untuk baris yang dikembalikan (O(top_n), bukan O(produk))
+            pop = self._popularity
+            most_liked['average_rating'] = pop['sum'][top] / np.maximum(pop['count'][top], 1)
+            return most_liked[MOST_LIKED_COLUMNS]
@@ -0,0 +1,160 @@
+# src/search_index.py
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import CountVectorizer
+import logging
+from src.preprocessing import fill_missing
+from src.modelling import select_top_n
+from src.name_lookup import TOKEN_PATTERN
+
+logger = logging.getLogger(__name__)
+
+# Field yang di-index beserta bobotnya di skor BM25 (nama/brand/kategori lebih menentukan daripada deskripsi)
+FIELD_WEIGHTS = {'Name': 2.0, 'Brand': 1.5, 'Category': 1.5, 'Tags': 1.0, 'Description': 1.0}
+
+def _merge_vocabularies(vocabularies: list):
+    """Gabung vocabulary per field → (terms terurut, remap kolom lokal → id global per field)."""
+    local_terms = [np.asarray(vocab, dtype=str) for vocab in vocabularies]
+    terms = np.unique(np.concatenate(local_terms)) if local_terms else np.empty(0, dtype=str)
+    return terms, [np.searchsorted(terms, local) for local in local_terms]
+
+class SearchIndex:
+    """Inverted index keyword search atas katalog (Name/Brand/Category/Tags/Description).
+
+    Per field disimpan posting list term → posisi produk (NumPy terurut, read-only) beserta
+    impact BM25 yang sudah dihitung saat build (idf × saturasi tf × normalisasi panjang field ×
+    bobot field), sehingga query hanya mengumpulkan dan menjumlahkan posting list term query.
+    Mendukung operator AND/OR dan prefix matching (term dicari di vocabulary terurut).
+    """
+
+    def __init__(self, df: pd.DataFrame, field_weights: dict = None, k1: float = 1.2, b: float = 0.75,
+                 max_expansions: int = 50):
+        self.field_weights = {f: w for f, w in (field_weights or FIELD_WEIGHTS).items() if f in df.columns}
+        self.max_expansions = max_expansions
+        self.n_docs = len(df)
+        fields = list(self.field_weights)
+
+        # 1. Hitung term per field (tokenisasi sama dengan TOKEN_PATTERN, lowercase)
+        counts, vocabularies = [], []
+        for field in fields:
+            texts = fill_missing(df[field], '').astype(str)
+            vectorizer = CountVectorizer(token_pattern=TOKEN_PATTERN.pattern, dtype=np.float32)
+            try:
+                matrix = vectorizer.fit_transform(texts)
+                vocab = vectorizer.get_feature_names_out()
+            except ValueError:
+                # Field tanpa token sama sekali
+                matrix, vocab = sp.csr_matrix((self.n_docs, 0), dtype=np.float32), []
+            counts.append(matrix)
+            vocabularies.append(vocab)
+        self.terms, remaps = _merge_vocabularies(vocabularies)
+        self.terms.flags.writeable = False
+        n_terms = len(self.terms)
+
+        # 2. Kolom lokal → id term global; document frequency dihitung atas semua field
+        matrices = []
+        for matrix, remap in zip(counts, remaps):
+            matrix = sp.csr_matrix((matrix.data, remap[matrix.indices], matrix.indptr), shape=(self.n_docs, n_terms))
+            matrix.sort_indices()
+            matrices.append(matrix)
+        presence = sum((m > 0).astype(np.int32) for m in matrices) if matrices else sp.csr_matrix((self.n_docs, 0))
+        doc_freq = np.bincount(sp.csr_matrix(presence).indices, minlength=n_terms)
+        self.doc_freq = doc_freq
+        idf = np.log1p((self.n_docs - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+
+        # 3. Impact BM25 per posting, lalu transpose ke posting list (CSC: term → posisi terurut)
+        self.postings = {}
+        for field, matrix in zip(fields, matrices):
+            doc_len = np.asarray(matrix.sum(axis=1)).ravel()
+            avg_len = doc_len.mean() if self.n_docs and doc_len.mean() > 0 else 1.0
+            row_len = np.repeat(doc_len, np.diff(matrix.indptr))
+            tf = matrix.data
+            matrix.data = (self.field_weights[field] * idf[matrix.indices] * tf * (k1 + 1)
+                           / (tf + k1 * (1 - b + b * row_len / avg_len))).astype(np.float32)
+            self.postings[field] = self._to_postings(matrix)
+        # Posting gabungan semua field (impact dijumlahkan per produk): query tanpa batasan field
+        # cukup membaca satu posting list per term, tanpa penggabungan antar field
+        self.all_postings = self._to_postings(sum(matrices) if matrices else sp.csr_matrix((self.n_docs, n_terms)))
+        logger.info(f"Search index: {self.n_docs} produk, {n_terms} term, "
+                    f"{sum(p[1].size for p in self.postings.values())} posting ({', '.join(fields)})")
+
+    def _to_postings(self, matrix):
+        """Matriks impact produk × term → (offsets, posisi, impact) per term (CSC, read-only)."""
+        doc_dtype = np.int32 if self.n_docs < np.iinfo(np.int32).max else np.int64
+        postings = sp.csc_matrix(matrix, dtype=np.float32)
+        postings.sort_indices()
+        arrays = (postings.indptr.astype(np.int64), postings.indices.astype(doc_dtype), postings.data)
+        for arr in arrays:
+            arr.flags.writeable = False
+        return arrays
+
+    def _term_ids(self, token: str, prefix: bool) -> np.ndarray:
+        """Id term untuk satu token query: exact, atau semua term berawalan token (maks. max_expansions,
+        yang document frequency-nya terbesar)."""
+        lo = int(np.searchsorted(self.terms, token, side='left'))
+        if not prefix:
+            found = lo < len(self.terms) and self.terms[lo] == token
+            return np.arange(lo, lo + 1) if found else np.empty(0, dtype=np.int64)
+        hi = int(np.searchsorted(self.terms, token + '\U0010ffff', side='left'))
+        ids = np.arange(lo, hi)
+        if len(ids) > self.max_expansions:
+            ids = np.sort(ids[np.argsort(-self.doc_freq[ids], kind='stable')[:self.max_expansions]])
+        return ids
+
+    def _token_postings(self, term_ids: np.ndarray, fields):
+        """Posting list gabungan satu token (semua term hasil ekspansi × field) → (posisi unik terurut, skor)."""
+        docs, impacts = [], []
+        sources = [self.all_postings] if fields is None else [self.postings[field] for field in fields]
+        for offsets, field_docs, field_impacts in sources:
+            for t in term_ids:
+                start, stop = offsets[t], offsets[t + 1]
+                if stop > start:
+                    docs.append(field_docs[start:stop])
+                    impacts.append(field_impacts[start:stop])
+        if not docs:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        if len(docs) == 1:
+            return docs[0], impacts[0]
+        unique_docs, inverse = np.unique(np.concatenate(docs), return_inverse=True)
+        return unique_docs, np.bincount(inverse, weights=np.concatenate(impacts)).astype(np.float32)
+
+    def _evaluate(self, query: str, fields, operator: str, prefix: bool):
+        """Posisi yang cocok (terurut) dan skor BM25-nya; operator 'and' (semua token) atau 'or' (salah satu)."""
+        if operator not in ('and', 'or'):
+            raise ValueError(f"operator harus 'and' atau 'or', bukan '{operator}'")
+        if fields is not None:
+            fields = [f for f in fields if f in self.postings]
+        tokens = list(dict.fromkeys(TOKEN_PATTERN.findall(str(query).lower())))
+        groups = [self._token_postings(self._term_ids(token, prefix), fields) for token in tokens]
+        if not groups:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        if operator == 'and':
+            # Irisan mulai dari posting list terpendek: kandidat dicari di posting list lain via
+            # searchsorted (O(kandidat · log posting)), skor token ikut diambil dari posisi yang sama
+            groups.sort(key=lambda g: len(g[0]))
+            docs, scores = groups[0]
+            for group_docs, group_scores in groups[1:]:
+                if len(docs) == 0:
+                    break
+                pos = np.minimum(np.searchsorted(group_docs, docs), len(group_docs) - 1)
+                hit = group_docs[pos] == docs
+                docs, scores = docs[hit], scores[hit] + group_scores[pos[hit]]
+            return docs, scores
+
+        docs, inverse = np.unique(np.concatenate([g[0] for g in groups]), return_inverse=True)
+        return docs, np.bincount(inverse, weights=np.concatenate([g[1] for g in groups])).astype(np.float32)
+
+    def match(self, query: str, fields=None, operator: str = 'and', prefix: bool = False) -> np.ndarray:
+        """Semua posisi produk yang cocok, urut posisi (untuk filter/halaman kategori)."""
+        return self._evaluate(query, fields, operator, prefix)[0]
+
+    def search(self, query: str, n: int = 10, fields=None, operator: str = 'and', prefix: bool = False):
+        """Top-n produk menurut skor BM25 → (posisi, skor) urut skor menurun; n=None → semua yang cocok."""
+        docs, scores = self._evaluate(query, fields, operator, prefix)
+        if len(docs) == 0:
+            return docs, scores
+        top, top_scores = select_top_n(scores[None, :], len(docs) if n is None else min(n, len(docs)))
+        return docs[top[0]], top_scores[0]
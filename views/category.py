@@ -3,7 +3,7 @@ from components.layout import render_header, render_footer
 from components.logic import filter_by_category
 from components.cards import display_grid
 
-def show(df):
+def show(df, search_index=None):
     category_name = st.session_state.get("selected_category", "Others")
     
     render_header(show_search_controls=False, custom_title=
@@ -12,7 +12,7 @@ def show(df):
         <span style="font-weight: 600; color: #1e293b;">{category_name}</span>
     </div>""")
 
-    filtered_df = filter_by_category(df, category_name)
+    filtered_df = filter_by_category(df, category_name, search_index)
     st.markdown(f"Found **{len(filtered_df)}** products in {category_name}")
     st.markdown("---")
 
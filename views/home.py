@@ -95,9 +95,12 @@ def show(df, cf_recommender):
         with cols[idx % 5]:
             render_product_card(row, full_df=df, prefix="feat")
 
-    # 6. Recommendation
+    # 6. Recommendation: personal dari isi keranjang (item-item CF), fallback ke produk terpopuler
     if cf_recommender:
-        recom_prods = cf_recommender.get_most_liked_products(top_n=15)
+        cart = st.session_state.get("cart", [])
+        recom_prods = cf_recommender.recommend_for_items(cart, n=15) if cart else None
+        if recom_prods is None or recom_prods.empty:
+            recom_prods = cf_recommender.get_most_liked_products(top_n=15)
         if not recom_prods.empty:
             # HAPUS full_df=df
             display_grid(recom_prods, "❤️ Rekomendasi Untuk Anda", prefix="recom")
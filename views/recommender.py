@@ -5,6 +5,7 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from components.layout import render_header, render_footer
 from components.cards import display_grid, display_evaluation_ui
+from components.logic import log_event
 
 # Import fungsi visualisasi
 from src.visualisasi import (
@@ -14,6 +15,13 @@ from src.visualisasi import (
     plot_correlation_heatmap
 )
 
+def _pick_suggestion(name):
+    """Callback tombol "did you mean": isi ulang kolom pencarian lalu jalankan pencarian."""
+    st.session_state["global_search_query"] = name
+    st.session_state[f"hdr_search_{st.session_state.get('current_page')}"] = name
+    st.session_state["trigger_search"] = True
+    if 'did_you_mean' in st.session_state: del st.session_state['did_you_mean']
+
 def show(df, recommender, llm_tools, metrics, cf_recommender):
     # 1. Render Header
     product_query, top_n, run_search, run_eval = render_header(show_search_controls=True)
@@ -76,6 +84,7 @@ def show(df, recommender, llm_tools, metrics, cf_recommender):
         if 'search_error' in st.session_state: del st.session_state['search_error']
         if 'ai_query_msg' in st.session_state: del st.session_state['ai_query_msg']
         
+        log_event("search", query=product_query)
         with st.spinner(f"Mencari produk terbaik untuk '{product_query}'..."):
             interpreted = product_query
             
@@ -91,6 +100,12 @@ def show(df, recommender, llm_tools, metrics, cf_recommender):
             
             recs = recommender.get_recommendations(interpreted, int(top_n))
 
+            # Tawarkan pilihan "did you mean" jika produk acuan hasil fuzzy match
+            if 'did_you_mean' in st.session_state: del st.session_state['did_you_mean']
+            match = recommender.resolve_product(interpreted)
+            if match and match[1] == "fuzzy":
+                st.session_state['did_you_mean'] = recommender.suggest_products(interpreted, k=5)['Name'].tolist()
+
             if isinstance(recs, str) or recs.empty:
                 # KASUS TIDAK DITEMUKAN
                 st.session_state['current_rekom'] = None
@@ -115,6 +130,14 @@ def show(df, recommender, llm_tools, metrics, cf_recommender):
         st.info("Silakan masukkan kata kunci produk di kolom pencarian atas ☝️")
         st.session_state['current_rekom'] = None
 
+    # --- TAMPILAN "DID YOU MEAN" ---
+    if st.session_state.get('did_you_mean') and not st.session_state.get('search_error'):
+        st.markdown("🔎 **Mungkin maksud Anda:**")
+        cols_dym = st.columns(len(st.session_state['did_you_mean']))
+        for i, (col, name) in enumerate(zip(cols_dym, st.session_state['did_you_mean'])):
+            with col:
+                st.button(name, key=f"dym_{i}", on_click=_pick_suggestion, args=(name,), use_container_width=True)
+
     # --- TAMPILAN PESAN AI (PERSISTENT) ---
     if 'ai_query_msg' in st.session_state and not st.session_state.get('search_error'):
         st.info(st.session_state['ai_query_msg'])